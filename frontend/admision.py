@@ -0,0 +1,204 @@
+# admision.py
+"""
+Control de admisión para descargas de PDF (por proceso).
+
+Limita cuántos PDFs se descargan a la vez y cuántos bytes de PDF pueden estar
+en vuelo. Quien no cabe espera en una fila justa: una fila FIFO por usuario y
+turnos rotativos entre usuarios, para que nadie acapare los lugares abriendo
+varias pestañas. Los endpoints ligeros (login, /users/me, listas) nunca pasan
+por aquí, así que conservan su propio carril aunque la fila de PDFs esté llena.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import plazo
+
+MAX_PDF_CONCURRENTES = int(os.environ.get("SYSTESO_PDF_CONCURRENTES", "4"))
+MAX_MB_EN_VUELO = float(os.environ.get("SYSTESO_PDF_MB_EN_VUELO", "64"))
+BYTES_ESTIMADOS_PDF = 2 * 1024 * 1024  # reserva inicial mientras no se conoce el tamaño real
+ESPERA_MAXIMA_S = 90
+
+
+class EsperaAgotada(Exception):
+    """Se agotó el tiempo de espera en la fila de PDFs."""
+
+
+class _Ticket:
+    __slots__ = ("usuario", "bytes", "admitido")
+
+    def __init__(self, usuario: str, nbytes: int):
+        self.usuario = usuario
+        self.bytes = nbytes
+        self.admitido = False
+
+
+class ControlAdmision:
+    def __init__(self, max_concurrentes: int = MAX_PDF_CONCURRENTES,
+                 max_bytes: int = int(MAX_MB_EN_VUELO * 1024 * 1024)):
+        self.max_concurrentes = max(1, max_concurrentes)
+        self.max_bytes = max(1, max_bytes)
+        self._cond = threading.Condition()
+        self._filas: "OrderedDict[str, deque]" = OrderedDict()  # orden = turno rotativo
+        self.activos = 0
+        self.bytes_en_vuelo = 0
+        # métricas
+        self.admitidos = 0
+        self.esperas_agotadas = 0
+
+    # ---------- internos (con self._cond tomado) ----------
+    def _cabe(self, t: _Ticket) -> bool:
+        if self.activos >= self.max_concurrentes:
+            return False
+        # un PDF más grande que todo el presupuesto pasa si no hay otro en vuelo
+        return self.activos == 0 or self.bytes_en_vuelo + t.bytes <= self.max_bytes
+
+    def _despachar(self):
+        """Admite tickets en turno rotativo mientras haya capacidad."""
+        while self._filas:
+            usuario, fila = next(iter(self._filas.items()))
+            t = fila[0]
+            if not self._cabe(t):
+                return
+            fila.popleft()
+            self._filas.pop(usuario)
+            if fila:
+                self._filas[usuario] = fila  # pasa al final de la rotación
+            t.admitido = True
+            self.activos += 1
+            self.bytes_en_vuelo += t.bytes
+            self.admitidos += 1
+            self._cond.notify_all()
+
+    def _posicion(self, t: _Ticket) -> int:
+        """Lugar (1 = siguiente) simulando las rondas del turno rotativo."""
+        filas = [list(f) for f in self._filas.values()]
+        pos, ronda = 0, 0
+        while True:
+            quedan = False
+            for f in filas:
+                if ronda < len(f):
+                    quedan = True
+                    pos += 1
+                    if f[ronda] is t:
+                        return pos
+            if not quedan:
+                return pos
+            ronda += 1
+
+    # ---------- API ----------
+    def pedir(self, usuario: str, nbytes: int = BYTES_ESTIMADOS_PDF) -> _Ticket:
+        t = _Ticket(usuario, nbytes)
+        with self._cond:
+            self._filas.setdefault(usuario, deque()).append(t)
+            self._despachar()
+        return t
+
+    def esperar(self, t: _Ticket, al_esperar=None, timeout: float = ESPERA_MAXIMA_S):
+        """Bloquea hasta ser admitido; llama al_esperar(posicion) cuando cambia."""
+        limite = time.monotonic() + timeout
+        ultima = None
+        with self._cond:
+            while not t.admitido:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._retirar(t)
+                    self.esperas_agotadas += 1
+                    raise EsperaAgotada()
+                pos = self._posicion(t)
+                if al_esperar and pos != ultima:
+                    ultima = pos
+                    self._cond.release()
+                    try:
+                        al_esperar(pos)
+                    finally:
+                        self._cond.acquire()
+                    continue
+                self._cond.wait(min(restante, 0.5))
+
+    def ajustar(self, t: _Ticket, nbytes: int):
+        """Corrige la reserva con el tamaño real una vez conocido."""
+        with self._cond:
+            if t.admitido:
+                self.bytes_en_vuelo += nbytes - t.bytes
+            t.bytes = nbytes
+
+    def _retirar(self, t: _Ticket):
+        fila = self._filas.get(t.usuario)
+        if fila and t in fila:
+            fila.remove(t)
+            if not fila:
+                self._filas.pop(t.usuario)
+
+    def liberar(self, t: _Ticket):
+        with self._cond:
+            if t.admitido:
+                t.admitido = False
+                self.activos -= 1
+                self.bytes_en_vuelo -= t.bytes
+            else:
+                self._retirar(t)
+            self._despachar()
+            self._cond.notify_all()
+
+    def metricas(self) -> dict:
+        with self._cond:
+            return {
+                "activos": self.activos,
+                "max_concurrentes": self.max_concurrentes,
+                "mb_en_vuelo": round(self.bytes_en_vuelo / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "en_fila": sum(len(f) for f in self._filas.values()),
+                "usuarios_en_fila": len(self._filas),
+                "admitidos": self.admitidos,
+                "esperas_agotadas": self.esperas_agotadas,
+            }
+
+
+control_pdf = ControlAdmision()
+
+
+@contextmanager
+def turno_pdf(usuario: str, al_esperar=None, timeout: float = ESPERA_MAXIMA_S):
+    """
+    Uso:
+        with turno_pdf(rfc, al_esperar=mostrar_posicion) as turno:
+            resp = descargar(..., stream=True)
+            turno.ajustar(content_length)       # si se conoce, antes de leer el cuerpo
+            for trozo in resp.iter_content(...):
+                turno.cubrir(leidos)            # si no, la reserva crece con lo leído
+            turno.ajustar(len(datos))
+    """
+    # la espera en la fila también cuenta contra el presupuesto del rerun
+    restante = plazo.restante()
+    por_plazo = restante is not None and restante < timeout
+    if por_plazo:
+        timeout = restante
+    t = control_pdf.pedir(usuario)
+    try:
+        try:
+            control_pdf.esperar(t, al_esperar, timeout)
+        except EsperaAgotada as e:
+            if por_plazo:
+                raise plazo.agotado_por_timeout() from e
+            raise
+        yield _Turno(t)
+    finally:
+        control_pdf.liberar(t)
+
+
+class _Turno:
+    __slots__ = ("_t",)
+
+    def __init__(self, t: _Ticket):
+        self._t = t
+
+    def ajustar(self, nbytes: int):
+        control_pdf.ajustar(self._t, nbytes)
+
+    def cubrir(self, leidos: int):
+        """Si lo leído ya rebasó la reserva, la duplica (o la lleva a lo leído)."""
+        if leidos > self._t.bytes:
+            control_pdf.ajustar(self._t, max(leidos, 2 * self._t.bytes))
@@ -1,15 +1,14 @@
 import streamlit as st
 import re
 import requests
+import backends
 from utils import EMAIL_REGEX, PASSWORD_REGEX
 
-BASE_URL = "https://api.zapatamorelos.gob.mx"
-
 def login_user(email: str, password: str):
     try:
-        r = requests.post(f"{BASE_URL}/users/login",
+        r = backends.post("/users/login",
                           json={"email": email, "password": password},
-                          timeout=15)
+                          timeout=15, idempotente=True)
     except requests.RequestException as e:
         return {"error": "conexion", "detail": str(e)}
 
@@ -68,10 +67,17 @@ def register_user():
                 )
         else:
             data = {"clave": clave, "rfc": rfc, "email": email, "password": password}
+            response = None
             with st.spinner("📡 Enviando solicitud..."):
-                response = requests.post("https://systeso-backend-production.up.railway.app/users/register", json=data)
+                try:
+                    response = backends.post("/users/register", json=data, timeout=15)
+                except requests.RequestException as e:
+                    st.markdown(
+                        f"<div style='text-align: center; color: red; font-weight: bold;'>❌ No se pudo conectar con el servidor: {e}</div>",
+                        unsafe_allow_html=True
+                    )
 
-            if response.status_code == 201:
+            if response is not None and response.status_code == 201:
                 st.session_state.registro_exitoso = True
                 st.session_state.view = "login"
                 for key in ["clave", "rfc", "reg_email", "reg_password", "confirm_password"]:
@@ -81,7 +87,7 @@ def register_user():
                     unsafe_allow_html=True
                 )
                 st.rerun()
-            else:
+            elif response is not None:
                 try:
                     error = response.json().get("detail", "Error desconocido")
                 except:
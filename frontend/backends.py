@@ -0,0 +1,167 @@
+# backends.py
+"""
+Registro de hosts del backend con selección por latencia y failover.
+
+El mismo API está publicado en dos hosts (dominio del ayuntamiento y Railway).
+En lugar de fijar uno por llamada, cada petición se hace con una ruta
+("/recibos/...") y el registro elige el mejor host sano:
+
+- un hilo en segundo plano verifica cada host periódicamente;
+- cada respuesta (real o de verificación) alimenta un EWMA de latencia y de
+  tasa de error por host;
+- se ordenan los hosts por latencia penalizada por errores; si el primero
+  falla (conexión, timeout, 5xx o circuito abierto) se reintenta en el
+  siguiente. Para POST solo hay failover si la llamada es idempotente.
+
+Hosts configurables con SYSTESO_BACKENDS (separados por coma), p. ej. dos
+stubs locales: SYSTESO_BACKENDS=http://127.0.0.1:8765,http://127.0.0.1:8766
+"""
+import os
+import threading
+import time
+
+import requests
+
+import plazo
+import resiliencia
+
+HOSTS_POR_DEFECTO = [
+    "https://api.zapatamorelos.gob.mx",
+    "https://systeso-backend-production.up.railway.app",
+]
+RUTA_SALUD = os.environ.get("SYSTESO_RUTA_SALUD", "/")
+INTERVALO_SALUD_S = 15
+TIMEOUT_SALUD_S = 5
+ALFA = 0.2                 # peso de la última muestra en los EWMA
+ERROR_MAXIMO = 0.5         # con más tasa de error el host se considera no sano
+PENALIZACION_ERROR = 10    # cuánto pesa la tasa de error frente a la latencia
+
+
+def _hosts_configurados() -> list:
+    conf = os.environ.get("SYSTESO_BACKENDS") or os.environ.get("SYSTESO_BACKEND_URL")
+    if not conf:
+        return list(HOSTS_POR_DEFECTO)
+    return [h.strip().rstrip("/") for h in conf.split(",") if h.strip()]
+
+
+class Host:
+    def __init__(self, url: str):
+        self.url = url
+        self.latencia = None      # EWMA en segundos
+        self.error = 0.0          # EWMA de fallos (0..1)
+        self.sano = True
+        self.verificado = 0.0
+        self.peticiones = 0
+
+    def observar(self, segundos: float, ok: bool):
+        self.peticiones += 1
+        self.latencia = segundos if self.latencia is None else ALFA * segundos + (1 - ALFA) * self.latencia
+        self.error = ALFA * (0.0 if ok else 1.0) + (1 - ALFA) * self.error
+
+    def puntaje(self) -> float:
+        lat = self.latencia if self.latencia is not None else 1.0
+        return lat * (1 + PENALIZACION_ERROR * self.error)
+
+
+class Registro:
+    def __init__(self, hosts: list):
+        self._lock = threading.Lock()
+        self.hosts = [Host(h) for h in hosts]
+        self._hilo = None
+
+    # ---------- verificación en segundo plano ----------
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle_salud, name="systeso-salud", daemon=True)
+                self._hilo.start()
+
+    def _bucle_salud(self):
+        while True:
+            for h in self.hosts:
+                self.verificar(h)
+            time.sleep(INTERVALO_SALUD_S)
+
+    def verificar(self, h: Host):
+        t0 = time.perf_counter()
+        try:
+            ok = requests.get(h.url + RUTA_SALUD, timeout=TIMEOUT_SALUD_S).status_code < 500
+        except requests.RequestException:
+            ok = False
+        with self._lock:
+            h.observar(time.perf_counter() - t0, ok)
+            h.sano = ok and h.error < ERROR_MAXIMO
+            h.verificado = time.time()
+
+    # ---------- selección ----------
+    def ordenados(self) -> list:
+        """Hosts sanos por puntaje; los no sanos al final como último recurso."""
+        with self._lock:
+            return sorted(self.hosts, key=lambda h: (not h.sano, h.puntaje()))
+
+    def observar(self, h: Host, segundos: float, ok: bool):
+        with self._lock:
+            h.observar(segundos, ok)
+            if h.error >= ERROR_MAXIMO:
+                h.sano = False
+
+    def metricas(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "host": h.url,
+                    "sano": h.sano,
+                    "latencia_ms": round(h.latencia * 1000, 1) if h.latencia is not None else None,
+                    "tasa_error": round(h.error, 3),
+                    "peticiones": h.peticiones,
+                }
+                for h in self.hosts
+            ]
+
+
+registro = Registro(_hosts_configurados())
+
+
+def peticion(metodo: str, ruta: str, idempotente: bool | None = None, **kwargs) -> requests.Response:
+    """
+    Hace la petición contra el mejor host y, si falla, contra los siguientes.
+    Devuelve la primera respuesta < 500; si todas fallan, la última respuesta
+    5xx o relanza la última excepción.
+    """
+    registro.iniciar()
+    if idempotente is None:
+        idempotente = metodo.upper() in ("GET", "HEAD")
+    candidatos = registro.ordenados()
+    if not idempotente:
+        candidatos = candidatos[:1]
+
+    ultima_resp, ultimo_error = None, None
+    for h in candidatos:
+        t0 = time.perf_counter()
+        try:
+            resp = resiliencia.peticion(metodo, h.url + ruta, **kwargs)
+        except plazo.PresupuestoAgotado:
+            raise  # sin tiempo no tiene caso probar otro host
+        except resiliencia.CircuitoAbierto as e:
+            ultimo_error = e
+            continue
+        except requests.RequestException as e:
+            registro.observar(h, time.perf_counter() - t0, False)
+            ultimo_error = e
+            continue
+        ok = resp.status_code < 500
+        registro.observar(h, time.perf_counter() - t0, ok)
+        if ok:
+            return resp
+        ultima_resp = resp
+    if ultima_resp is not None:
+        return ultima_resp
+    raise ultimo_error
+
+
+def get(ruta: str, **kwargs) -> requests.Response:
+    return peticion("GET", ruta, **kwargs)
+
+
+def post(ruta: str, **kwargs) -> requests.Response:
+    return peticion("POST", ruta, **kwargs)
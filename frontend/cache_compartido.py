@@ -0,0 +1,210 @@
+# cache_compartido.py
+"""
+Cache compartido entre procesos de Streamlit.
+
+Backends:
+- CacheMemoria: dict en el proceso (por defecto, un solo worker).
+- CacheSQLite: archivo SQLite local en modo WAL; varios workers en la misma
+  máquina comparten entradas sin servicios externos. Cada escritura es una
+  sola sentencia dentro de una transacción, así que un lector nunca ve una
+  entrada a medias. Si SQLite falla (p. ej. "database is locked" con muchos
+  escritores) la lectura cuenta como fallo de cache y la escritura se omite:
+  el cache nunca rompe una vista.
+
+Se elige con la variable de entorno SYSTESO_CACHE:
+    SYSTESO_CACHE=memoria                      (defecto)
+    SYSTESO_CACHE=sqlite:/var/tmp/systeso.db
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+MAX_MB_CACHE = float(os.environ.get("SYSTESO_CACHE_MB", "256"))
+MAX_MB_ENTRADA = 16  # PDFs o listas más grandes no se guardan
+
+# TTL por tipo de dato (segundos)
+TTL_LISTA = 300
+TTL_PDF = 3600
+TTL_HISTORIAL = 60
+TTL_ENLACE = 120    # resultado de verificar un enlace de correo
+
+
+def clave_usuario(token: str) -> str:
+    """Identificador estable y no reversible del token (las entradas son por usuario)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:24]
+
+
+class CacheBackend(ABC):
+    """Interfaz mínima: valores en bytes con TTL."""
+
+    @abstractmethod
+    def get(self, clave: str):
+        ...
+
+    @abstractmethod
+    def set(self, clave: str, valor: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, clave: str):
+        ...
+
+    # ---------- helpers JSON ----------
+    def get_json(self, clave: str):
+        raw = self.get(clave)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def set_json(self, clave: str, valor, ttl: float):
+        # default=str: fechas que llegan como datetime desde Arrow/msgpack
+        self.set(clave, json.dumps(valor, separators=(",", ":"), default=str).encode("utf-8"), ttl)
+
+
+class CacheMemoria(CacheBackend):
+    def __init__(self, max_bytes: int = int(MAX_MB_CACHE * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._datos: "OrderedDict[str, tuple]" = OrderedDict()  # clave -> (expira, valor)
+        self._bytes = 0
+
+    def get(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self._quitar(clave)
+                return None
+            self._datos.move_to_end(clave)
+            return item[1]
+
+    def set(self, clave, valor, ttl):
+        if len(valor) > MAX_MB_ENTRADA * 1024 * 1024:
+            return
+        with self._lock:
+            self._quitar(clave)
+            self._datos[clave] = (time.time() + ttl, valor)
+            self._bytes += len(valor)
+            while self._bytes > self.max_bytes and self._datos:
+                self._quitar(next(iter(self._datos)))
+
+    def delete(self, clave):
+        with self._lock:
+            self._quitar(clave)
+
+    def _quitar(self, clave):
+        item = self._datos.pop(clave, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+
+class CacheSQLite(CacheBackend):
+    def __init__(self, ruta: str, max_bytes: int = int(MAX_MB_CACHE * 1024 * 1024)):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._escrituras = 0
+        self.fallos = 0   # errores de SQLite tratados como fallo de cache
+        with self._con() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " clave TEXT PRIMARY KEY,"
+                " valor BLOB NOT NULL,"
+                " bytes INTEGER NOT NULL,"
+                " expira REAL NOT NULL,"
+                " creado REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS cache_expira ON cache(expira)")
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+            con = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def get(self, clave):
+        try:
+            fila = self._con().execute(
+                "SELECT valor FROM cache WHERE clave = ? AND expira >= ?",
+                (clave, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            self.fallos += 1
+            return None
+        return bytes(fila[0]) if fila else None
+
+    def set(self, clave, valor, ttl):
+        if len(valor) > MAX_MB_ENTRADA * 1024 * 1024:
+            return
+        ahora = time.time()
+        try:
+            self._con().execute(
+                "INSERT OR REPLACE INTO cache (clave, valor, bytes, expira, creado) VALUES (?, ?, ?, ?, ?)",
+                (clave, sqlite3.Binary(valor), len(valor), ahora + ttl, ahora),
+            )
+            self._escrituras += 1
+            if self._escrituras % 50 == 0:
+                self.purgar()
+        except sqlite3.Error:
+            self.fallos += 1
+
+    def delete(self, clave):
+        try:
+            self._con().execute("DELETE FROM cache WHERE clave = ?", (clave,))
+        except sqlite3.Error:
+            self.fallos += 1
+
+    def purgar(self):
+        """Borra expirados y, si se pasa del límite, las entradas más antiguas."""
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DELETE FROM cache WHERE expira < ?", (time.time(),))
+            total = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                sobran = total - self.max_bytes
+                viejas = con.execute("SELECT clave, bytes FROM cache ORDER BY creado").fetchall()
+                borrar = []
+                for clave, nbytes in viejas:
+                    if sobran <= 0:
+                        break
+                    borrar.append((clave,))
+                    sobran -= nbytes
+                con.executemany("DELETE FROM cache WHERE clave = ?", borrar)
+            con.execute("COMMIT")
+        except Exception:
+            try:
+                con.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache() -> CacheBackend:
+    """Backend configurado para este proceso (se crea una sola vez)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            conf = os.environ.get("SYSTESO_CACHE", "memoria")
+            if conf.startswith("sqlite:"):
+                _cache = CacheSQLite(conf[len("sqlite:"):] or "cache/systeso.db")
+            else:
+                _cache = CacheMemoria()
+        return _cache
@@ -0,0 +1,107 @@
+# cache_navegador.py
+"""
+Cache de recibos ya vistos en el navegador (IndexedDB).
+
+Los recibos no cambian una vez emitidos, así que el PDF que el usuario ya
+abrió se guarda en su navegador y las siguientes veces se pinta desde ahí,
+sin pasar por el servidor de Streamlit ni por el backend.
+
+El componente (componentes/recibo_local/index.html) guarda cada PDF con la
+clave "ámbito:id:huella":
+- ámbito: hash del RFC de la sesión. El propio componente hace la limpieza
+  (purgar()): en la pantalla de login, sin ámbito, borra la base completa; ya
+  con sesión, borra las entradas de cualquier otro RFC. Así no depende de un
+  script lanzado justo antes del st.rerun() de borrar_token(), que el
+  navegador puede no llegar a ejecutar;
+- huella: hash de contenido que manda el backend, o en su defecto de los
+  metadatos del recibo (id, periodo, archivo). Si el recibo se reemplaza,
+  la huella cambia y la entrada vieja deja de usarse.
+Al pasar de MAX_MB se descartan las entradas usadas hace más tiempo.
+
+Flujo (dentro del fragmento de recibos):
+1) se pinta el componente sin PDF; el navegador busca la entrada y responde
+   "local" (ya la pinta), "falta" o "sin_idb";
+2) con "falta" se descarga como siempre y el PDF viaja una sola vez al
+   componente, que lo guarda y lo pinta;
+3) con "sin_idb" (modo privado, navegador sin IndexedDB) se usa la vista
+   normal de recibos.py.
+
+SYSTESO_CACHE_NAVEGADOR=0 lo desactiva.
+"""
+import base64
+import hashlib
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+ACTIVO = os.environ.get("SYSTESO_CACHE_NAVEGADOR", "1") != "0"
+MAX_MB = float(os.environ.get("SYSTESO_CACHE_NAVEGADOR_MB", "50"))
+BASE_DATOS = "systeso_recibos"
+
+_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "componentes", "recibo_local")
+_componente = components.declare_component("recibo_local", path=_DIR)
+
+
+def activo() -> bool:
+    return ACTIVO
+
+
+# =========================== CLAVES ===========================
+def ambito(rfc: str | None, token: str) -> str:
+    """Hash del RFC (o del token si no hay RFC): el RFC no queda en claro en el navegador."""
+    base = (rfc or "").strip().upper() or token[-32:]
+    return hashlib.sha256(f"systeso:{base}".encode("utf-8")).hexdigest()[:16]
+
+
+def huella_recibo(recibo) -> str:
+    """Hash de contenido del backend si lo manda; si no, de los metadatos del recibo (modelo_recibos.Recibo)."""
+    if recibo.hash_contenido:
+        return recibo.hash_contenido[:64]
+    base = f"{recibo.id}|{recibo.periodo}|{recibo.nombre_archivo}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()[:16]
+
+
+# =========================== COMPONENTE ===========================
+def estado_previo(id_recibo, huella: str) -> str | None:
+    """Lo que respondió el navegador para este recibo en un rerun anterior."""
+    valor = st.session_state.get(_clave(id_recibo, huella))
+    return valor.get("estado") if isinstance(valor, dict) else None
+
+
+def _clave(id_recibo, huella: str) -> str:
+    return f"recibo_local_{id_recibo}_{huella}"
+
+
+def mostrar(id_recibo, huella: str, ambito_usuario: str, pdf_bytes: bytes | None = None,
+            nombre: str = "recibo.pdf", max_width_px: int = 1200, alto_px: int = 900) -> str | None:
+    """
+    Pinta el componente. Sin pdf_bytes busca en IndexedDB; con pdf_bytes lo
+    guarda y lo pinta. Devuelve el estado que reportó el navegador
+    ("local", "guardado", "falta", "sin_idb") o None si aún no responde.
+    """
+    valor = _componente(
+        id=str(id_recibo),
+        huella=huella,
+        ambito=ambito_usuario,
+        base_datos=BASE_DATOS,
+        max_bytes=int(MAX_MB * 1024 * 1024),
+        pdf_b64=base64.b64encode(pdf_bytes).decode("ascii") if pdf_bytes else None,
+        nombre=nombre,
+        max_width_px=max_width_px,
+        alto_px=alto_px,
+        key=_clave(id_recibo, huella),
+        default=None,
+    )
+    return valor.get("estado") if isinstance(valor, dict) else None
+
+
+def purgar(ambito_usuario: str = ""):
+    """
+    Limpieza sin pintar nada: con ámbito vacío (login) borra la base; con
+    ámbito, las entradas de otros RFC. No responde a Python (no provoca reruns).
+    """
+    if not ACTIVO:
+        return
+    _componente(modo="purgar", ambito=ambito_usuario, base_datos=BASE_DATOS,
+                key="recibo_local_purgar", default=None)
@@ -1,8 +1,12 @@
 # cargar_excel.py
 import streamlit as st
 import requests
+import backends
+from plazo import propio
 from utils import obtener_token
 
+PLAZO_EXCEL_S = 600  # importar la plantilla tiene su propio plazo, fuera del presupuesto del rerun
+
 def cargar_excel_empleados():
     st.subheader("📥 Carga de Empleados desde Excel")
     st.markdown("Sube un archivo Excel con los datos de empleados para agregarlos al sistema.")
@@ -14,9 +18,13 @@ def cargar_excel_empleados():
             token = obtener_token()
             headers = {"Authorization": f"Bearer {token}"}
 
-            with st.spinner("⏳ Procesando archivo..."):
-                files = {"archivo": (archivo.name, archivo.getvalue())}
-                response = requests.post("https://systeso-backend-production.up.railway.app/empleados/cargar_excel", headers=headers, files=files)
+            try:
+                with st.spinner("⏳ Procesando archivo..."), propio(PLAZO_EXCEL_S):
+                    files = {"archivo": (archivo.name, archivo.getvalue())}
+                    response = backends.post("/empleados/cargar_excel", headers=headers, files=files)
+            except requests.RequestException as e:
+                st.error(f"❌ No se pudo conectar con el backend: {e}")
+                return
 
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
@@ -0,0 +1,201 @@
+# cobertura.py
+"""
+Tablero de cobertura de recibos por quincena (admin).
+
+Mantiene un agregado empleados x periodos que se actualiza por deltas:
+- cada recibo nuevo suma 1 a su periodo y, si es el primero de ese empleado
+  en ese periodo y el empleado está en la plantilla, suma 1 a "cubiertos";
+- cada alta/baja en la plantilla ajusta "cubiertos" solo en los periodos
+  donde ese RFC tiene recibos.
+Así el porcentaje de cobertura por periodo sale en O(1) y la lista de
+faltantes se calcula solo para el periodo que se está viendo.
+
+Los recibos llegan de /recibos/admin/indice a partir del último cursor (solo
+lo nuevo tras cada carga) y la plantilla de /empleados/.
+"""
+import threading
+import time
+
+import requests
+import streamlit as st
+
+from diagnostico import medido
+from exportar import paginas
+from modelo_recibos import clave_periodo
+from plazo import PresupuestoAgotado, aviso_agotado
+from utils import obtener_token
+
+PAGINA_COBERTURA = 5000
+REFRESCO_PLANTILLA_S = 600
+
+
+class Cobertura:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.plantilla: dict = {}      # rfc -> {"clave", "nombre"}
+        self.recibos: dict = {}        # periodo -> {rfc: n_recibos}
+        self.total_recibos: dict = {}  # periodo -> recibos contados (suma de self.recibos[periodo])
+        self.cubiertos: dict = {}      # periodo -> empleados de plantilla con >=1 recibo
+        self.vistos: set = set()       # ids de recibo ya contados
+        self.cursor = None
+        self.plantilla_sync = 0.0
+
+    # ---------- deltas ----------
+    def agregar_recibo(self, rid, rfc: str, periodo: str):
+        rfc = (rfc or "").upper()
+        with self._lock:
+            if rid is not None:
+                if rid in self.vistos:
+                    return
+                self.vistos.add(rid)
+            por_rfc = self.recibos.setdefault(periodo, {})
+            previo = por_rfc.get(rfc, 0)
+            por_rfc[rfc] = previo + 1
+            self.total_recibos[periodo] = self.total_recibos.get(periodo, 0) + 1
+            if previo == 0 and rfc in self.plantilla:
+                self.cubiertos[periodo] = self.cubiertos.get(periodo, 0) + 1
+
+    def alta_empleado(self, rfc: str, datos: dict):
+        rfc = rfc.upper()
+        with self._lock:
+            nuevo = rfc not in self.plantilla
+            self.plantilla[rfc] = datos
+            if nuevo:
+                for periodo, por_rfc in self.recibos.items():
+                    if por_rfc.get(rfc):
+                        self.cubiertos[periodo] = self.cubiertos.get(periodo, 0) + 1
+
+    def baja_empleado(self, rfc: str):
+        rfc = rfc.upper()
+        with self._lock:
+            if self.plantilla.pop(rfc, None) is None:
+                return
+            for periodo, por_rfc in self.recibos.items():
+                if por_rfc.get(rfc):
+                    self.cubiertos[periodo] -= 1
+
+    def registrar_resultado_carga(self, data):
+        """
+        Aplica el detalle de una carga de ZIP si el backend lo incluye. Los
+        recibos sin id se omiten: sin id no se pueden marcar como vistos y la
+        siguiente sincronización del índice los volvería a sumar.
+        """
+        if not isinstance(data, dict):
+            return
+        for r in data.get("recibos") or []:
+            if r.get("id") is not None and r.get("rfc") and r.get("periodo"):
+                self.agregar_recibo(r["id"], r["rfc"], r["periodo"])
+
+    # ---------- sincronización ----------
+    def sincronizar_recibos(self, headers: dict) -> int:
+        """
+        Sigue el next_cursor del servidor. En la última página no hay siguiente
+        y se conserva el cursor con el que se pidió: la próxima sincronización
+        la relee (los ids ya vistos no se vuelven a contar) y sigue con lo nuevo.
+        """
+        nuevos = 0
+        for pagina in paginas("/recibos/admin/indice", headers, limit=PAGINA_COBERTURA,
+                              cursor=self.cursor, al_cursor=self._avanzar_cursor):
+            for r in pagina:
+                self.agregar_recibo(r.get("id"), r.get("rfc", ""), r.get("periodo", ""))
+            nuevos += len(pagina)
+        return nuevos
+
+    def _avanzar_cursor(self, cursor: str):
+        with self._lock:
+            self.cursor = cursor
+
+    def sincronizar_plantilla(self, headers: dict):
+        """Compara con la plantilla actual y aplica solo altas y bajas."""
+        actual = {}
+        for pagina in paginas("/empleados/", headers, limit=PAGINA_COBERTURA):
+            for e in pagina:
+                if e.get("rfc"):
+                    actual[e["rfc"].upper()] = {"clave": e.get("clave"), "nombre": e.get("nombre", "")}
+        with self._lock:
+            for rfc in set(self.plantilla) - set(actual):
+                self.baja_empleado(rfc)
+            for rfc, datos in actual.items():
+                self.alta_empleado(rfc, datos)
+            self.plantilla_sync = time.time()
+
+    # ---------- consulta ----------
+    def resumen(self) -> list:
+        with self._lock:
+            total = len(self.plantilla)
+            filas = []
+            for periodo in sorted(self.recibos, key=clave_periodo, reverse=True):
+                cub = self.cubiertos.get(periodo, 0)
+                filas.append({
+                    "Periodo": periodo,
+                    "Recibos": self.total_recibos.get(periodo, 0),
+                    "Con recibo": cub,
+                    "Faltantes": total - cub,
+                    "Cobertura %": round(100 * cub / total, 1) if total else 0.0,
+                })
+            return filas
+
+    def faltantes(self, periodo: str) -> list:
+        with self._lock:
+            con_recibo = self.recibos.get(periodo, {})
+            return [
+                {"RFC": rfc, "Clave": d.get("clave"), "Nombre": d.get("nombre")}
+                for rfc, d in self.plantilla.items() if not con_recibo.get(rfc)
+            ]
+
+
+@st.cache_resource
+def _cobertura() -> Cobertura:
+    """Un agregado por proceso, compartido entre administradores."""
+    return Cobertura()
+
+
+def registrar_resultado_carga(data):
+    _cobertura().registrar_resultado_carga(data)
+
+
+# =========================== PANTALLA (admin) ===========================
+def mostrar_cobertura():
+    token = obtener_token()
+    if not token:
+        st.error("No hay token. Inicia sesión.")
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    cob = _cobertura()
+
+    st.subheader("📊 Cobertura de recibos por quincena")
+
+    forzar = st.button("🔄 Actualizar plantilla", key="btn_cob_plantilla")
+    try:
+        with st.spinner("Actualizando..."):
+            if forzar or time.time() - cob.plantilla_sync > REFRESCO_PLANTILLA_S:
+                cob.sincronizar_plantilla(headers)
+            cob.sincronizar_recibos(headers)
+    except PresupuestoAgotado as e:
+        aviso_agotado(e, "cobertura")  # los recibos que sí llegaron ya están sumados
+    except requests.RequestException as e:
+        st.warning(f"No se pudo actualizar la cobertura: {e}")
+
+    filas = cob.resumen()
+    st.caption(f"👥 Plantilla: {len(cob.plantilla):,} empleados · {len(filas)} periodos")
+    if not filas:
+        st.info("Todavía no hay recibos cargados.")
+        return
+
+    st.dataframe(
+        filas, use_container_width=True, hide_index=True,
+        column_config={"Cobertura %": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.1f%%")},
+    )
+    _faltantes(cob, [f["Periodo"] for f in filas])
+
+
+@st.fragment
+@medido("fragmento faltantes")
+def _faltantes(cob: Cobertura, periodos: list):
+    periodo = st.selectbox("Ver faltantes del periodo:", options=periodos, key="sel_cob_periodo")
+    faltan = cob.faltantes(periodo)
+    if not faltan:
+        st.success("✅ Todos los empleados de la plantilla tienen recibo en este periodo.")
+        return
+    st.warning(f"⚠️ {len(faltan):,} empleados sin recibo en {periodo}")
+    st.dataframe(faltan, use_container_width=True, hide_index=True)
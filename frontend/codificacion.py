@@ -0,0 +1,137 @@
+# codificacion.py
+"""
+Negociación de formato y compresión para los endpoints de listas
+(/recibos/, /empleados/historial_cargas).
+
+- Compresión: no se toca; requests ya anuncia todo lo que urllib3 sabe
+  descomprimir en este entorno (gzip/deflate siempre; br y zstd si están
+  brotli/zstandard).
+- Formato: se prefiere un stream Arrow IPC (columnar, el más compacto y
+  rápido de decodificar), luego MessagePack y por último JSON. Con Arrow el
+  cursor de la siguiente página viaja en el encabezado X-Next-Cursor.
+Si el servidor ignora el Accept, se recibe JSON como siempre.
+
+Comparativa de bytes y tiempo de decodificación:
+    python codificacion.py
+"""
+import io
+import json
+
+try:
+    import msgpack
+except ImportError:  # dependencia opcional
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+
+CT_ARROW = "application/vnd.apache.arrow.stream"
+CT_MSGPACK = "application/x-msgpack"
+CT_JSON = "application/json"
+
+
+def _accept() -> str:
+    tipos = []
+    if pa is not None:
+        tipos.append(CT_ARROW)
+    if msgpack is not None:
+        tipos.append(f"{CT_MSGPACK};q=0.9")
+    tipos.append(f"{CT_JSON};q=0.5")
+    return ", ".join(tipos)
+
+
+def encabezados_lista(headers: dict | None = None) -> dict:
+    """Encabezados para pedir una lista en el formato más compacto disponible."""
+    h = dict(headers or {})
+    h["Accept"] = _accept()
+    return h
+
+
+def decodificar(resp):
+    """
+    Devuelve el cuerpo como lo daría resp.json(): lista de dicts, o
+    {"items": [...], "next_cursor": ...} para respuestas paginadas.
+    """
+    ct = (resp.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if ct == CT_ARROW and pa is not None:
+        items = pa_ipc.open_stream(io.BytesIO(resp.content)).read_all().to_pylist()
+        cursor = resp.headers.get("x-next-cursor")
+        if "x-next-cursor" in {k.lower() for k in resp.headers}:
+            return {"items": items, "next_cursor": cursor or None}
+        return items
+    if ct == CT_MSGPACK and msgpack is not None:
+        return msgpack.unpackb(resp.content, raw=False)
+    return resp.json()
+
+
+# =========================== CODIFICADORES (stub/benchmark) ===========================
+def codificar(items: list, formato: str) -> bytes:
+    if formato == "arrow":
+        tabla = pa.Table.from_pylist(items)
+        buf = io.BytesIO()
+        with pa_ipc.new_stream(buf, tabla.schema) as w:
+            w.write_table(tabla)
+        return buf.getvalue()
+    if formato == "msgpack":
+        return msgpack.packb(items, use_bin_type=True)
+    return json.dumps(items).encode("utf-8")
+
+
+def formatos_disponibles() -> list:
+    return ["json"] + (["msgpack"] if msgpack is not None else []) + (["arrow"] if pa is not None else [])
+
+
+def _comparar():
+    import gzip
+    import time
+    import zlib
+
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+
+    def recibos(n):
+        return [
+            {
+                "id": i,
+                "periodo": f"{1 + 15 * (i % 2):02d}/ene./{2025 + i // 24} al {15 + 13 * (i % 2):02d}/ene./{2025 + i // 24}",
+                "nombre_archivo": f"recibo_{2025 + i // 24}_{(i // 2) % 12 + 1:02d}_{i % 2 + 1}.pdf",
+                "rfc": f"GOMJ8{i % 10}0101AB{i % 7}",
+                "clave": str(1000 + i % 3000),
+            }
+            for i in range(n)
+        ]
+
+    def decodificar_bytes(datos, formato):
+        if formato == "arrow":
+            return pa_ipc.open_stream(io.BytesIO(datos)).read_all().to_pylist()
+        if formato == "msgpack":
+            return msgpack.unpackb(datos, raw=False)
+        return json.loads(datos)
+
+    compresores = {"ninguna": (lambda b: b, lambda b: b),
+                   "gzip": (gzip.compress, gzip.decompress),
+                   "deflate": (zlib.compress, zlib.decompress)}
+    if zstandard is not None:
+        compresores["zstd"] = (zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress)
+
+    print(f"{'n':>8} {'formato':>8} {'compresión':>10} {'bytes':>12} {'decodif. ms':>12}")
+    for n in (300, 10_000, 100_000):
+        items = recibos(n)
+        for formato in formatos_disponibles():
+            crudo = codificar(items, formato)
+            for nombre, (comp, descomp) in compresores.items():
+                cuerpo = comp(crudo)
+                t0 = time.perf_counter()
+                for _ in range(3):
+                    decodificar_bytes(descomp(cuerpo), formato)
+                ms = (time.perf_counter() - t0) / 3 * 1000
+                print(f"{n:>8} {formato:>8} {nombre:>10} {len(cuerpo):>12,} {ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    _comparar()
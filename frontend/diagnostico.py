@@ -0,0 +1,127 @@
+# diagnostico.py
+"""
+Medición ligera del tiempo de script por interacción.
+
+- with rerun_medido(): tiempo de un rerun completo de app.py, también de
+  los que terminan en st.rerun()/st.stop() (salen con excepción).
+- @medido("nombre"): tiempo de una función (p. ej. un fragmento que se
+  re-ejecuta solo).
+Ambos toman además la foto de widgets para trazas.py (si está activo).
+
+Las muestras viven en memoria del proceso (últimas N por región) y se pueden
+ver en el panel de diagnóstico de administradores.
+
+Perfilado bajo demanda (solo administradores): con ?perfil=1 en la URL, la
+vista actual se ejecuta dentro de cProfile; se muestran las funciones más
+costosas y se guarda el .prof en SYSTESO_PERFILES_DIR para analizarlo después
+(snakeviz, flameprof, gprof2dot...). Sin el parámetro no se crea ningún
+perfilador.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from collections import defaultdict, deque
+
+import streamlit as st
+
+import trazas
+
+MUESTRAS_POR_REGION = 200
+DIR_PERFILES = os.environ.get("SYSTESO_PERFILES_DIR", "perfiles")
+TOP_FUNCIONES = 25
+
+_muestras = defaultdict(lambda: deque(maxlen=MUESTRAS_POR_REGION))
+_lock = threading.Lock()
+
+
+def registrar(region: str, segundos: float):
+    with _lock:
+        _muestras[region].append(segundos)
+
+
+@contextmanager
+def rerun_medido(region: str = "rerun completo"):
+    trazas.capturar(inicio=True)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(region, time.perf_counter() - t0)
+
+
+def medido(region: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            trazas.capturar()
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registrar(region, time.perf_counter() - t0)
+        return envoltura
+    return deco
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p * (len(orden) - 1))))]
+
+
+def resumen_tiempos() -> list:
+    """Una fila por región con n, p50, p95 y máximo en milisegundos."""
+    with _lock:
+        copia = {k: list(v) for k, v in _muestras.items()}
+    return [
+        {
+            "región": region,
+            "n": len(v),
+            "p50_ms": round(_percentil(v, 0.50) * 1000, 1),
+            "p95_ms": round(_percentil(v, 0.95) * 1000, 1),
+            "max_ms": round(max(v) * 1000, 1) if v else 0.0,
+        }
+        for region, v in sorted(copia.items())
+    ]
+
+
+# =========================== PERFILADOR ===========================
+def perfil_solicitado(rol: str) -> bool:
+    return rol == "admin" and st.query_params.get("perfil") == "1"
+
+
+def _guardar_perfil(prof: cProfile.Profile, vista: str) -> str:
+    os.makedirs(DIR_PERFILES, exist_ok=True)
+    ruta = os.path.join(DIR_PERFILES, f"{time.strftime('%Y%m%d-%H%M%S')}_{vista}.prof")
+    prof.dump_stats(ruta)
+    return ruta
+
+
+@contextmanager
+def perfil_rerun(vista: str):
+    """Perfila el bloque y muestra el top de funciones por tiempo acumulado."""
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    prof.enable()
+    try:
+        yield
+    except BaseException:
+        # st.rerun()/st.stop() también llegan aquí: se guarda, no se muestra
+        prof.disable()
+        _guardar_perfil(prof, vista)
+        raise
+    prof.disable()
+    total = time.perf_counter() - t0
+    ruta = _guardar_perfil(prof, vista)
+
+    salida = io.StringIO()
+    pstats.Stats(prof, stream=salida).strip_dirs().sort_stats("cumulative").print_stats(TOP_FUNCIONES)
+    with st.expander(f"🧪 Perfil de '{vista}' · {total*1000:.0f} ms", expanded=True):
+        st.caption(f"Guardado en `{ruta}`")
+        st.code(salida.getvalue(), language="text")
@@ -0,0 +1,107 @@
+# enlaces.py
+"""
+Resultado por token de los enlaces que llegan por correo (verificación de
+email y restablecimiento de contraseña).
+
+Streamlit re-ejecuta app.py en cada interacción y, mientras el token siga en
+la URL, la vista del enlace se vuelve a pintar. Para que cada token llegue al
+backend una sola vez:
+
+- el resultado definitivo (éxito o token inválido) se guarda en el cache
+  compartido con un TTL corto, indexado por un hash del token;
+- reruns concurrentes con el mismo token esperan la misma petición en vuelo
+  (single-flight) en lugar de repetirla.
+Los errores de red no se guardan: el siguiente intento vuelve a preguntar.
+"""
+import json
+
+import requests
+
+import backends
+from cache_compartido import obtener_cache, clave_usuario, TTL_ENLACE
+from resiliencia import SingleFlight
+
+TIMEOUT_ENLACE_S = 15
+
+_vuelos = SingleFlight()
+
+
+def _detalle(resp, por_defecto: str) -> str:
+    try:
+        return resp.json().get("detail", por_defecto) or por_defecto
+    except (ValueError, AttributeError):
+        return por_defecto
+
+
+def _con_cache(tipo: str, token: str, fn) -> dict:
+    clave = f"enlace:{tipo}:{clave_usuario(token)}"
+    compartido = obtener_cache()
+    previo = compartido.get_json(clave)
+    if previo is not None:
+        return previo
+
+    def consultar():
+        # otro rerun pudo terminar mientras esperábamos el turno
+        ya = compartido.get_json(clave)
+        if ya is not None:
+            return ya
+        resultado = fn()
+        if resultado["estado"] != "error":
+            compartido.set_json(clave, resultado, TTL_ENLACE)
+        return resultado
+
+    return _vuelos.hacer(clave, consultar)
+
+
+# =========================== VERIFICACIÓN DE CORREO ===========================
+def verificar_token_email(token: str) -> dict:
+    """{"estado": "ok" | "invalido" | "error", "detalle": str}"""
+    def consultar():
+        try:
+            resp = backends.get("/users/verificar_email", params={"token": token},
+                                timeout=TIMEOUT_ENLACE_S)
+        except requests.RequestException:
+            return {"estado": "error", "detalle": "No se pudo conectar con el servidor."}
+        if resp.status_code == 200:
+            return {"estado": "ok", "detalle": ""}
+        if resp.status_code >= 500:
+            return {"estado": "error", "detalle": _detalle(resp, "Error inesperado del servidor.")}
+        return {"estado": "invalido", "detalle": _detalle(resp, "Error inesperado del servidor.")}
+
+    return _con_cache("verificar", token, consultar)
+
+
+# =========================== RESTABLECER CONTRASEÑA ===========================
+def restablecer_password(token: str, nueva: str) -> dict:
+    """
+    Cambia la contraseña con el token del enlace. Un doble envío idéntico
+    (mismo token y misma contraseña) comparte la petición en vuelo y, ya
+    aplicado, devuelve el éxito guardado en lugar de volver a consumir el
+    token. La clave cubre todo el cuerpo: otra contraseña con el mismo token
+    sí llega al backend.
+    Solo se guarda el éxito: un rechazo (p. ej. contraseña débil) permite reintentar.
+    """
+    cuerpo = {"token": token, "nueva_password": nueva}
+    clave = f"enlace:reset:{clave_usuario(json.dumps(cuerpo, sort_keys=True))}"
+    compartido = obtener_cache()
+    previo = compartido.get_json(clave)
+    if previo is not None:
+        return previo
+
+    def enviar():
+        ya = compartido.get_json(clave)
+        if ya is not None:
+            return ya
+        try:
+            resp = backends.post("/users/reset_password",
+                                 json=cuerpo,
+                                 timeout=20)
+        except requests.RequestException as e:
+            return {"estado": "error", "detalle": f"Error de red: {e}"}
+        if resp.status_code == 200:
+            resultado = {"estado": "ok", "detalle": ""}
+            compartido.set_json(clave, resultado, TTL_ENLACE)
+            return resultado
+        return {"estado": "rechazado", "detalle": _detalle(resp, "Error al cambiar la contraseña.")}
+
+    return _vuelos.hacer(clave, enviar)
@@ -0,0 +1,257 @@
+# explorador.py
+"""
+Explorador de recibos para administradores.
+
+Carga los metadatos de todos los recibos (periodo, nombre_archivo, RFC,
+clave) por páginas y arma un índice invertido en memoria, compartido por el
+proceso. Las actualizaciones siguen el next_cursor del servidor (opaco) y,
+al terminar, se vuelve a pedir la última página desde su cursor para recoger
+lo nuevo; los recibos que ya estaban se actualizan si cambiaron.
+
+Búsqueda tipo "typeahead": cada palabra de la consulta es un prefijo cuyos
+términos están en un rango de la lista ordenada (vía bisect). Se parte de la
+palabra más selectiva y se intersecta con las listas de ids de las demás
+(listas ordenadas: por bisect si hay pocos candidatos, con conjuntos si no).
+"""
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+
+import requests
+import streamlit as st
+
+import backends
+from diagnostico import medido
+from exportar import panel_exportar, COLUMNAS_RECIBOS
+from plazo import PresupuestoAgotado, aviso_agotado
+from utils import obtener_token
+
+PAGINA_INDICE = 2000
+PAGINAS_POR_CARGA = 10       # páginas por rerun antes de devolver el control a la UI
+REFRESCO_AUTOMATICO_S = 60   # antigüedad mínima para pedir novedades al abrir la vista
+RESULTADOS_POR_PAGINA = 25
+
+_NO_ALFANUM = re.compile(r"[^0-9a-z]+")
+
+
+def _normalizar(texto: str) -> str:
+    t = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return t.lower()
+
+
+def _terminos(texto: str) -> list:
+    return [t for t in _NO_ALFANUM.split(_normalizar(texto)) if t]
+
+
+class IndiceRecibos:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.registros: dict = {}       # id -> (periodo, nombre_archivo, rfc, clave)
+        self._postings: dict = {}       # termino -> array de ids (crecientes)
+        self._orden: list = []          # términos ordenados para búsqueda por prefijo
+        self.cursor = None
+        self.completo = False
+        self.ultima_sync = 0.0
+
+    # ---------- carga incremental ----------
+    def _quitar(self, rid: int, terminos):
+        for term in terminos:
+            lista = self._postings.get(term)
+            if lista is None:
+                continue
+            i = bisect_left(lista, rid)
+            if i < len(lista) and lista[i] == rid:
+                del lista[i]
+            if not lista:
+                del self._postings[term]
+                j = bisect_left(self._orden, term)
+                if j < len(self._orden) and self._orden[j] == term:
+                    del self._orden[j]
+
+    def agregar(self, items: list):
+        """Agrega recibos nuevos y actualiza los que cambiaron."""
+        with self._lock:
+            nuevos_terminos = []
+            for r in items:
+                rid = int(r["id"])
+                reg = (
+                    str(r.get("periodo", "")),
+                    str(r.get("nombre_archivo", "")),
+                    str(r.get("rfc", "")).upper(),
+                    str(r.get("clave", "")),
+                )
+                previo = self.registros.get(rid)
+                if previo == reg:
+                    continue
+                terminos = set(_terminos(" ".join(reg)))
+                if previo is not None:
+                    anteriores = set(_terminos(" ".join(previo)))
+                    self._quitar(rid, anteriores - terminos)
+                    terminos -= anteriores
+                self.registros[rid] = reg
+                for term in terminos:
+                    lista = self._postings.get(term)
+                    if lista is None:
+                        lista = self._postings[term] = array("q")
+                        nuevos_terminos.append(term)
+                    if not lista or lista[-1] < rid:
+                        lista.append(rid)
+                    else:
+                        lista.insert(bisect_left(lista, rid), rid)  # actualización de un id viejo
+            # Carga masiva: reordenar una vez; goteo: insertar en su lugar
+            if len(nuevos_terminos) > 256:
+                self._orden = sorted(self._postings)
+            else:
+                for term in nuevos_terminos:
+                    insort(self._orden, term)
+
+    def sincronizar(self, headers: dict, max_paginas: int = PAGINAS_POR_CARGA):
+        """Pide páginas nuevas desde el cursor. Devuelve cuántos recibos llegaron."""
+        recibidos = 0
+        for _ in range(max_paginas):
+            params = {"limit": PAGINA_INDICE}
+            if self.cursor:
+                params["cursor"] = self.cursor
+            resp = backends.get("/recibos/admin/indice", headers=headers, params=params, timeout=30)
+            if resp.status_code != 200:
+                raise requests.HTTPError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            data = resp.json()
+            items = data.get("items") or []
+            self.agregar(items)
+            recibidos += len(items)
+            with self._lock:
+                siguiente = data.get("next_cursor")
+                if not siguiente:
+                    # se conserva el cursor de esta última página: la próxima
+                    # sincronización la relee y sigue con lo que llegue después
+                    self.completo = True
+                    self.ultima_sync = time.time()
+                    break
+                self.cursor = str(siguiente)
+                self.completo = False
+        return recibidos
+
+    # ---------- consulta ----------
+    def _rango(self, prefijo: str) -> range:
+        """Posiciones en self._orden de los términos que empiezan con el prefijo."""
+        ini = bisect_left(self._orden, prefijo)
+        fin = bisect_left(self._orden, prefijo + "\uffff", ini)
+        return range(ini, fin)
+
+    def _union(self, rango: range) -> set:
+        ids = set()
+        for i in rango:
+            ids.update(self._postings[self._orden[i]])
+        return ids
+
+    def _contiene(self, rango: range, rid: int) -> bool:
+        for i in rango:
+            lista = self._postings[self._orden[i]]
+            j = bisect_left(lista, rid)
+            if j < len(lista) and lista[j] == rid:
+                return True
+        return False
+
+    def buscar(self, consulta: str) -> list:
+        """Ids que cumplen todas las palabras (como prefijo), del más nuevo al más viejo."""
+        palabras = set(_terminos(consulta))
+        if not palabras:
+            return []
+        with self._lock:
+            rangos = {p: self._rango(p) for p in palabras}
+            tam = {p: sum(len(self._postings[self._orden[i]]) for i in r) for p, r in rangos.items()}
+            orden = sorted(palabras, key=tam.get)
+            if not tam[orden[0]]:
+                return []
+            # Se materializa solo la palabra más selectiva; las demás se intersectan
+            # con sus listas: bisect por candidato si salen menos comparaciones que
+            # unir la lista completa ("2026", "ene" tienen cientos de miles de ids).
+            candidatos = self._union(rangos[orden[0]])
+            for p in orden[1:]:
+                if not candidatos:
+                    break
+                rango = rangos[p]
+                if len(candidatos) * len(rango) * 16 < tam[p]:
+                    candidatos = {rid for rid in candidatos if self._contiene(rango, rid)}
+                else:
+                    candidatos &= self._union(rango)
+            return sorted(candidatos, reverse=True)
+
+    def registro(self, rid: int) -> dict:
+        periodo, nombre, rfc, clave = self.registros[rid]
+        return {"id": rid, "rfc": rfc, "clave": clave, "periodo": periodo, "nombre_archivo": nombre}
+
+
+@st.cache_resource
+def _indice() -> IndiceRecibos:
+    """Un índice por proceso, compartido entre sesiones de administradores."""
+    return IndiceRecibos()
+
+
+# =========================== PANTALLA (admin) ===========================
+def explorar_recibos():
+    token = obtener_token()
+    if not token:
+        st.error("No hay token. Inicia sesión.")
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    indice = _indice()
+
+    st.subheader("🔎 Buscar recibos")
+    st.markdown("Busca por RFC, clave de empleado, periodo o nombre de archivo.")
+
+    pendiente = not indice.completo or time.time() - indice.ultima_sync > REFRESCO_AUTOMATICO_S
+    col1, col2 = st.columns([3, 1])
+    if col2.button("🔄 Actualizar", use_container_width=True, key="btn_indice_refrescar"):
+        pendiente = True
+    if pendiente:
+        try:
+            with st.spinner("Cargando recibos al índice..."):
+                indice.sincronizar(headers)
+        except PresupuestoAgotado as e:
+            aviso_agotado(e, "indice")  # se busca sobre lo ya indexado
+        except requests.RequestException as e:
+            st.warning(f"No se pudo actualizar el índice: {e}")
+
+    estado = "completo" if indice.completo else "cargando…"
+    col1.caption(f"📚 {len(indice.registros):,} recibos indexados · {estado}")
+    if not indice.completo:
+        if st.button("⏬ Seguir cargando", key="btn_indice_mas"):
+            st.rerun()
+
+    _buscador(indice)
+    panel_exportar("recibos_metadatos", "/recibos/admin/indice", headers,
+                   COLUMNAS_RECIBOS, "recibos")
+
+
+@st.fragment
+@medido("fragmento buscador")
+def _buscador(indice: IndiceRecibos):
+    consulta = st.text_input("Buscar", placeholder="Ej. GOMJ800101 o 15/ene/2026", key="txt_buscar_recibo")
+    if not consulta:
+        return
+
+    t0 = time.perf_counter()
+    ids = indice.buscar(consulta)
+    ms = (time.perf_counter() - t0) * 1000
+
+    total = len(ids)
+    paginas = max(1, -(-total // RESULTADOS_POR_PAGINA))
+    col1, col2 = st.columns([3, 1])
+    col1.caption(f"{total:,} resultados · {ms:.1f} ms")
+    # una sola key para la página: vuelve a 1 cuando cambia la consulta
+    if st.session_state.get("_buscar_consulta") != consulta or st.session_state.get("num_buscar_pagina", 1) > paginas:
+        st.session_state["_buscar_consulta"] = consulta
+        st.session_state["num_buscar_pagina"] = 1
+    pagina = col2.number_input("Página", min_value=1, max_value=paginas, step=1,
+                               key="num_buscar_pagina") if paginas > 1 else 1
+    if not ids:
+        st.info("Sin coincidencias.")
+        return
+
+    ini = (pagina - 1) * RESULTADOS_POR_PAGINA
+    filas = [indice.registro(i) for i in ids[ini:ini + RESULTADOS_POR_PAGINA]]
+    st.dataframe(filas, use_container_width=True, hide_index=True)
@@ -0,0 +1,210 @@
+# exportar.py
+"""
+Exportación del historial de cargas y de los metadatos de recibos a CSV o
+Parquet, en streaming.
+
+La tubería es de generadores: páginas del backend -> filas -> escritor
+incremental a un archivo temporal. Nunca se arma el DataFrame completo; en
+memoria solo vive la página en curso, así que la exportación empieza con la
+primera página y el consumo es constante aunque el historial sea muy largo.
+
+Los archivos se escriben en una carpeta por sesión dentro de DIR_EXPORTAR.
+Al cerrar sesión se borra la carpeta (limpiar_exportaciones); las de sesiones
+que expiraron sin cerrar se barren por antigüedad al generar otra exportación.
+"""
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+import streamlit as st
+
+import backends
+from codificacion import encabezados_lista, decodificar
+from plazo import propio
+
+PAGINA_EXPORTAR = 1000
+PLAZO_EXPORTAR_S = 900  # la exportación la pide el usuario: tiene su propio plazo
+DIR_EXPORTAR = os.path.join(tempfile.gettempdir(), "systeso_export")
+EDAD_MAXIMA_S = 2 * 3600  # carpetas de sesiones que expiraron sin cerrar sesión
+
+COLUMNAS_HISTORIAL = ["nombre_archivo", "fecha_carga", "usuario"]
+COLUMNAS_RECIBOS = ["id", "rfc", "clave", "periodo", "nombre_archivo"]
+
+
+# =========================== FUENTES (generadores) ===========================
+def paginas(ruta: str, headers: dict, limit: int = PAGINA_EXPORTAR, cursor: str | None = None,
+            al_cursor=None):
+    """
+    Recorre un listado paginado ({"items", "next_cursor"}) y produce cada página,
+    opcionalmente a partir de un cursor previo.
+    al_cursor(next_cursor) se llama después de entregar cada página que tiene
+    siguiente, con el cursor del servidor que se va a seguir.
+    Si el backend devuelve una lista simple (sin paginación), es una sola página.
+    """
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        resp = backends.get(ruta, headers=encabezados_lista(headers), params=params, timeout=30)
+        if resp.status_code != 200:
+            raise requests.HTTPError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+        data = decodificar(resp)
+        if isinstance(data, list):
+            yield data
+            return
+        yield data.get("items") or []
+        cursor = data.get("next_cursor")
+        if not cursor:
+            return
+        if al_cursor:
+            al_cursor(str(cursor))
+
+
+def filas(paginas_iter, columnas: list):
+    """Aplana páginas a filas con solo las columnas pedidas."""
+    for pagina in paginas_iter:
+        for r in pagina:
+            yield {c: r.get(c) for c in columnas}
+
+
+def por_lotes(filas_iter, tam: int = PAGINA_EXPORTAR):
+    lote = []
+    for f in filas_iter:
+        lote.append(f)
+        if len(lote) >= tam:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# =========================== ESCRITORES ===========================
+def escribir_csv(filas_iter, columnas: list, ruta: str, al_avanzar=None) -> int:
+    n = 0
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.DictWriter(f, fieldnames=columnas)
+        w.writeheader()
+        for lote in por_lotes(filas_iter):
+            w.writerows(lote)
+            n += len(lote)
+            if al_avanzar:
+                al_avanzar(n)
+    return n
+
+
+def escribir_parquet(filas_iter, columnas: list, ruta: str, al_avanzar=None) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([(c, pa.int64() if c == "id" else pa.string()) for c in columnas])
+    n = 0
+    with pq.ParquetWriter(ruta, esquema, compression="zstd") as w:
+        for lote in por_lotes(filas_iter):
+            cols = {
+                c: [None if r[c] is None else (int(r[c]) if c == "id" else str(r[c])) for r in lote]
+                for c in columnas
+            }
+            w.write_table(pa.Table.from_pydict(cols, schema=esquema))
+            n += len(lote)
+            if al_avanzar:
+                al_avanzar(n)
+    return n
+
+
+ESCRITORES = {
+    "CSV": (escribir_csv, ".csv", "text/csv"),
+    "Parquet": (escribir_parquet, ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def exportar(ruta: str, headers: dict, columnas: list, formato: str, al_avanzar=None,
+             directorio: str | None = None):
+    """
+    Escribe la exportación de `ruta` (ruta del backend) en un archivo temporal
+    dentro de `directorio`. Devuelve (archivo, filas).
+    """
+    escritor, ext, _ = ESCRITORES[formato]
+    fd, archivo = tempfile.mkstemp(prefix="systeso_export_", suffix=ext, dir=directorio)
+    os.close(fd)
+    try:
+        n = escritor(filas(paginas(ruta, headers), columnas), columnas, archivo, al_avanzar)
+    except BaseException:
+        os.unlink(archivo)
+        raise
+    return archivo, n
+
+
+# =========================== ARCHIVOS POR SESIÓN ===========================
+def barrer(edad_maxima: float = EDAD_MAXIMA_S):
+    """Borra las carpetas de exportación sin cambios en más de edad_maxima segundos."""
+    limite = time.time() - edad_maxima
+    try:
+        entradas = list(os.scandir(DIR_EXPORTAR))
+    except OSError:
+        return
+    for e in entradas:
+        try:
+            if e.stat().st_mtime < limite:
+                if e.is_dir():
+                    shutil.rmtree(e.path, ignore_errors=True)
+                else:
+                    os.unlink(e.path)
+        except OSError:
+            pass
+
+
+def _dir_sesion() -> str:
+    """Carpeta de exportaciones de esta sesión (se crea al primer uso)."""
+    d = st.session_state.get("_exportar_dir")
+    if not d or not os.path.isdir(d):
+        os.makedirs(DIR_EXPORTAR, exist_ok=True)
+        d = st.session_state["_exportar_dir"] = tempfile.mkdtemp(prefix="sesion_", dir=DIR_EXPORTAR)
+    return d
+
+
+def limpiar_exportaciones():
+    """Al cerrar sesión: borra los archivos exportados de esta sesión."""
+    d = st.session_state.pop("_exportar_dir", None)
+    if d:
+        shutil.rmtree(d, ignore_errors=True)
+    for k in [k for k in st.session_state.keys() if str(k).startswith("_export_")]:
+        st.session_state.pop(k, None)
+
+
+# =========================== UI ===========================
+def panel_exportar(nombre: str, ruta: str, headers: dict, columnas: list, clave: str):
+    """Controles de exportación: genera el archivo por páginas y ofrece descargarlo."""
+    with st.expander("⬇️ Exportar"):
+        col1, col2 = st.columns([1, 2])
+        formato = col1.radio("Formato", list(ESCRITORES), horizontal=True, key=f"fmt_{clave}")
+        if col2.button("Generar exportación", key=f"btn_export_{clave}", use_container_width=True):
+            previo = st.session_state.pop(f"_export_{clave}", None)
+            if previo:
+                try:
+                    os.unlink(previo["ruta"])
+                except OSError:
+                    pass
+            barrer()
+            progreso = st.empty()
+            try:
+                with propio(PLAZO_EXPORTAR_S):
+                    archivo, n = exportar(ruta, headers, columnas, formato,
+                                          al_avanzar=lambda k: progreso.caption(f"⏳ {k:,} filas escritas…"),
+                                          directorio=_dir_sesion())
+            except (requests.RequestException, ValueError, OSError) as e:
+                progreso.empty()
+                st.error(f"No se pudo exportar: {e}")
+                return
+            progreso.empty()
+            st.session_state[f"_export_{clave}"] = {"ruta": archivo, "filas": n, "formato": formato}
+
+        listo = st.session_state.get(f"_export_{clave}")
+        if listo and os.path.exists(listo["ruta"]):
+            _, ext, mime = ESCRITORES[listo["formato"]]
+            st.caption(f"✅ {listo['filas']:,} filas · {os.path.getsize(listo['ruta'])/1024/1024:.2f} MB")
+            with open(listo["ruta"], "rb") as f:
+                st.download_button(f"Descargar {listo['formato']}", data=f, file_name=f"{nombre}{ext}",
+                                   mime=mime, key=f"dl_{clave}", use_container_width=True)
@@ -0,0 +1,265 @@
+# memoria_vistas.py
+"""
+Pruebas de regresión de memoria por vista.
+
+Cada escenario ejecuta app.py en un AppTest (streamlit.testing) contra el stub
+local (en otro proceso, para no contar sus asignaciones) con tracemalloc
+activo. Por interacción se mide:
+
+- pico: máximo de memoria asignada durante el rerun, sobre la línea base;
+- retenido: lo que sigue vivo después del rerun (tras gc).
+
+Ambos se expresan como múltiplo del tamaño de la carga útil del escenario
+(el PDF, el ZIP subido, el JSON del listado). Los límites salen de una
+corrida medida (línea base) más un margen: si un cambio agrega otra copia
+completa del PDF o del ZIP, el múltiplo sube en ~1 y el escenario falla.
+
+    python memoria_vistas.py --calibrar            # mide y escribe memoria_vistas_base.json
+    python memoria_vistas.py                       # todos los escenarios contra la línea base
+    python memoria_vistas.py recibos --mb-pdf 4
+    python memoria_vistas.py --limites otra_base.json
+
+La línea base se calibra en main y se versiona junto al código. Sale con
+código 1 si algún múltiplo excede su límite o si alguna vista lanzó una
+excepción (una vista que truena pronto casi no asigna memoria y pasaría).
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+import zipfile
+
+import stub_backend
+from sesion_prueba import caches_frios, sembrar_sesion
+
+ESCENARIOS = ("recibos", "subir_zip", "historial_excel", "explorar_recibos")
+LINEA_BASE = "memoria_vistas_base.json"   # {escenario: {"pico": x, "retenido": y}}
+MARGEN = 1.25                             # sobre lo medido al calibrar
+PISO = 0.1                                # límite mínimo: ruido de tracemalloc en vistas que casi no retienen
+
+
+# =========================== STUB ===========================
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _arrancar_stub(bytes_pdf: int, indice: int, historial: int):
+    puerto = _puerto_libre()
+    proc = subprocess.Popen(
+        [sys.executable, "stub_backend.py", "--port", str(puerto),
+         "--bytes-pdf", str(bytes_pdf), "--indice", str(indice), "--historial", str(historial)],
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{puerto}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base + "/_stub/llamadas", timeout=1).read()
+            return proc, base
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("El stub no arrancó")
+
+
+def _bytes_listado(base: str, ruta: str, limit: int = 5000) -> int:
+    """Tamaño en JSON de todas las páginas de un listado."""
+    total, cursor = 0, None
+    while True:
+        url = f"{base}{ruta}?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        with urllib.request.urlopen(url, timeout=30) as r:
+            cuerpo = r.read()
+        total += len(cuerpo)
+        data = json.loads(cuerpo)
+        cursor = data.get("next_cursor") if isinstance(data, dict) else None
+        if not cursor:
+            return total
+
+
+# =========================== ZIP DE PRUEBA ===========================
+class _Subido(io.BytesIO):
+    """Lo que devuelve st.file_uploader: BytesIO con nombre."""
+    name = "recibos_prueba.zip"
+
+
+def _zip_de_prueba(mb: float) -> bytes:
+    pdf = stub_backend.pdf_de_tamano(200_000)
+    n = max(1, int(mb * 1024 * 1024 // len(pdf)))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:
+        for i in range(n):
+            z.writestr(f"{stub_backend.rfc_stub(i)}_2026_01_1.pdf", pdf)
+    return buf.getvalue()
+
+
+# =========================== MEDICIÓN ===========================
+def _medir(at, accion=None) -> dict:
+    gc.collect()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    if accion:
+        accion(at)
+    at.run()
+    _, pico = tracemalloc.get_traced_memory()
+    gc.collect()
+    actual, _ = tracemalloc.get_traced_memory()
+    return {"pico": pico - base, "retenido": actual - base,
+            "errores": [str(e.value) for e in at.exception]}
+
+
+def _escenarios(args, base: str, zip_subido: bytes) -> dict:
+    """{nombre: (rol, vista, carga_bytes, [(interacción, acción)])}"""
+    bytes_pdf = int(args.mb_pdf * 1024 * 1024)
+    return {
+        "recibos": ("usuario", "recibos", bytes_pdf, [
+            # se cambia el mes y no el periodo: las opciones del periodo son Recibo
+            # con format_func, y AppTest solo sabe elegir opciones por su texto
+            ("render inicial (descarga PDF)", None),
+            ("otro mes (otro PDF)", lambda at: at.selectbox(key="sel_recibos_mes").select_index(1)),
+            ("mes ya visto (cache)", lambda at: at.selectbox(key="sel_recibos_mes").select_index(0)),
+        ]),
+        "subir_zip": ("admin", "subir_zip", len(zip_subido), [
+            ("render con archivo", None),
+            ("subir", lambda at: at.button(key="btn_subir_zip").click()),
+        ]),
+        "historial_excel": ("admin", "historial_excel",
+                            _bytes_listado(base, "/empleados/historial_cargas"), [
+            ("render inicial", None),
+            ("filtrar por usuario", lambda at: at.selectbox(key="sel_hist_user").select_index(1)),
+        ]),
+        "explorar_recibos": ("admin", "explorar_recibos",
+                             _bytes_listado(base, "/recibos/admin/indice"), [
+            ("sincronizar índice", None),
+            ("buscar", lambda at: at.text_input(key="txt_buscar_recibo").input(stub_backend.rfc_stub(7)[:6])),
+        ]),
+    }
+
+
+def correr_escenario(nombre: str, rol: str, vista: str, carga: int, pasos: list, app: str) -> list:
+    from streamlit.testing.v1 import AppTest
+
+    def nueva_app():
+        at = AppTest.from_file(app, default_timeout=120)
+        sembrar_sesion(at, rol)
+        at.session_state["view"] = vista
+        return at
+
+    # calentamiento sin medir: imports, compilación del script, caches de Streamlit
+    nueva_app().run()
+    caches_frios()
+
+    at = nueva_app()
+    filas = []
+    tracemalloc.start()
+    try:
+        for paso, accion in pasos:
+            m = _medir(at, accion)
+            filas.append({
+                "escenario": nombre, "interacción": paso, "carga": carga,
+                "pico": m["pico"], "retenido": m["retenido"],
+                "x_pico": round(m["pico"] / carga, 2), "x_retenido": round(m["retenido"] / carga, 2),
+                "errores": m["errores"],
+            })
+    finally:
+        tracemalloc.stop()
+    return filas
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Regresión de memoria por vista contra el stub")
+    ap.add_argument("escenarios", nargs="*", help=f"por defecto todos: {', '.join(ESCENARIOS)}")
+    ap.add_argument("--mb-pdf", type=float, default=2.0, help="tamaño de cada PDF del stub")
+    ap.add_argument("--mb-zip", type=float, default=20.0, help="tamaño del ZIP subido")
+    ap.add_argument("--indice", type=int, default=20000, help="recibos en el índice de administración")
+    ap.add_argument("--historial", type=int, default=50000, help="cargas en el historial de Excel")
+    ap.add_argument("--limites", default=LINEA_BASE, help="JSON de la línea base")
+    ap.add_argument("--calibrar", action="store_true", help="mide y escribe la línea base en --limites")
+    args = ap.parse_args()
+
+    aqui = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(aqui)
+    limites = {}
+    if not args.calibrar:
+        try:
+            with open(args.limites, encoding="utf-8") as f:
+                limites = json.load(f)
+        except FileNotFoundError:
+            print(f"❌ No hay línea base ({args.limites}). Corre primero: python memoria_vistas.py --calibrar")
+            sys.exit(1)
+
+    proc, base = _arrancar_stub(int(args.mb_pdf * 1024 * 1024), args.indice, args.historial)
+    try:
+        os.environ["SYSTESO_BACKENDS"] = base
+        os.environ.pop("SYSTESO_TRAZAS_DIR", None)
+        os.environ["SYSTESO_CACHE_NAVEGADOR"] = "0"  # AppTest no ejecuta componentes: sin respuesta del navegador
+        zip_subido = _zip_de_prueba(args.mb_zip)
+
+        # st.file_uploader no es interactivo en AppTest: se sustituye en el proceso
+        import streamlit as st
+        st.file_uploader = lambda *a, **k: _Subido(zip_subido)
+
+        escenarios = _escenarios(args, base, zip_subido)
+        elegidos = args.escenarios or list(escenarios)
+        filas = []
+        for nombre in elegidos:
+            rol, vista, carga, pasos = escenarios[nombre]
+            filas.extend(correr_escenario(nombre, rol, vista, carga, pasos, os.path.join(aqui, "app.py")))
+    finally:
+        proc.terminate()
+
+    print(f"{'escenario':<18} {'interacción':<32} {'carga MB':>9} {'pico MB':>9} {'x':>6} "
+          f"{'retenido MB':>12} {'x':>6}")
+    fallas = []
+    for f in filas:
+        lim = limites.get(f["escenario"])
+        marca_p = marca_r = ""
+        if lim is None and not args.calibrar:
+            fallas.append(f"{f['escenario']} (sin línea base)")
+        elif lim is not None:
+            marca_p = "❌" if f["x_pico"] > lim["pico"] else ""
+            marca_r = "❌" if f["x_retenido"] > lim["retenido"] else ""
+            if marca_p or marca_r:
+                fallas.append(f"{f['escenario']} / {f['interacción']}")
+        if f["errores"]:
+            fallas.append(f"{f['escenario']} / {f['interacción']} (excepción)")
+        print(f"{f['escenario']:<18} {f['interacción'][:32]:<32} {f['carga']/1048576:>9.2f} "
+              f"{f['pico']/1048576:>9.2f} {f['x_pico']:>6}{marca_p} "
+              f"{f['retenido']/1048576:>12.2f} {f['x_retenido']:>6}{marca_r}")
+        for e in f["errores"]:
+            print(f"{'':<20}⚠️ {e[:100]}")
+
+    if args.calibrar:
+        errores = [x for x in fallas if x.endswith("(excepción)")]
+        if errores:
+            print("❌ No se escribe la línea base: hubo excepciones en " + "; ".join(errores))
+            sys.exit(1)
+        linea = {}
+        if os.path.exists(args.limites):
+            with open(args.limites, encoding="utf-8") as fh:
+                linea = json.load(fh)   # se conservan los escenarios que no se corrieron
+        for nombre in dict.fromkeys(f["escenario"] for f in filas):
+            linea[nombre] = {"pico": PISO, "retenido": PISO}
+        for f in filas:
+            b = linea[f["escenario"]]
+            b["pico"] = max(b["pico"], round(f["x_pico"] * MARGEN, 1))
+            b["retenido"] = max(b["retenido"], round(max(f["x_retenido"], 0) * MARGEN, 1))
+        with open(args.limites, "w", encoding="utf-8") as fh:
+            json.dump(linea, fh, ensure_ascii=False, indent=2)
+        print(f"✅ Línea base escrita en {args.limites}:")
+        print(json.dumps(linea, indent=2))
+        return
+
+    if fallas:
+        print("❌ Regresión de memoria o vistas con error en: " + "; ".join(fallas))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
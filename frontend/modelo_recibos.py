@@ -0,0 +1,219 @@
+# modelo_recibos.py
+"""
+Modelo compacto de los recibos de un empleado.
+
+Recibo es un registro inmutable con __slots__: año, mes, etiqueta para el
+selectbox y clave de orden se calculan una sola vez al cargar el año, no en
+cada rerun. ColeccionRecibos agrupa los recibos por (año, mes) en tuplas ya
+ordenadas: filtrar es un acceso a diccionario y el selectbox recibe la misma
+tupla en cada rerun, sin pandas ni dicts nuevos.
+
+Aquí también se interpretan los textos de periodo (los usa cobertura.py).
+
+Comparación contra el camino anterior (DataFrame + to_dict("records")):
+
+    python modelo_recibos.py
+    python modelo_recibos.py --recibos 480 --reruns 5000
+"""
+import argparse
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from operator import attrgetter
+
+# === Meses tal y como los muestras en la UI ===
+MESES_ORDEN = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
+               "Jul", "Ago", "Sept", "Oct", "Nov", "Dic"]
+
+# Normalización total desde los textos del periodo (soportando formatos cortos y nombres de mes completos de 2026/2027)
+MESES_MAP = {
+    "ene.": "Ene", "ene": "Ene", "enero": "Ene",
+    "feb.": "Feb", "feb": "Feb", "febrero": "Feb",
+    "mar.": "Mar", "mar": "Mar", "marzo": "Mar",
+    "abr.": "Abr", "abr": "Abr", "abril": "Abr",
+    "may.": "May", "mayo": "May",
+    "jun.": "Jun", "jun": "Jun", "junio": "Jun",
+    "jul.": "Jul", "jul": "Jul", "julio": "Jul",
+    "ago.": "Ago", "ago": "Ago", "agosto": "Ago",
+    "sept.": "Sept", "sep.": "Sept", "sept": "Sept", "sep": "Sept", "septiembre": "Sept",
+    "oct.": "Oct", "oct": "Oct", "octubre": "Oct",
+    "nov.": "Nov", "nov": "Nov", "noviembre": "Nov",
+    "dic.": "Dic", "dic": "Dic", "diciembre": "Dic",
+}
+
+def extraer_mes(periodo: str) -> str:
+    """
+    Busca de forma flexible el mes en la primera fecha del periodo.
+    Soporta estructuras con guiones, diagonales o espacios extras.
+    """
+    try:
+        fecha_inicio = periodo.split(" al ")[0]
+        # Extrae el bloque alfabético central que representa al mes
+        match = re.search(r"\d{1,2}\s*[\/-]\s*([A-Za-zÁÉÍÓÚáéíóú\.]+)\s*[\/-]\s*\d{4}", fecha_inicio)
+        if match:
+            m = match.group(1).strip().lower()
+            return MESES_MAP.get(m, m.capitalize())
+        return "Otro"
+    except Exception:
+        return "Otro"
+
+def extraer_anio(periodo: str) -> str:
+    """
+    Extrae dinámicamente el año de 4 dígitos (2025, 2026, 2027, etc.) 
+    aislando el bloque numérico final de la primera fecha.
+    """
+    try:
+        fecha_inicio = periodo.split(" al ")[0]
+        match = re.search(r"\b(\d{4})\b", fecha_inicio)
+        if match:
+            return match.group(1)
+        return "0000"
+    except Exception:
+        return "0000"
+
+_DIA = re.compile(r"^\s*(\d{1,2})")
+
+
+def _orden(anio: str, mes: str, periodo: str) -> tuple:
+    m = _DIA.match(periodo)
+    return (
+        anio,
+        MESES_ORDEN.index(mes) if mes in MESES_ORDEN else 99,
+        int(m.group(1)) if m else 0,
+    )
+
+
+def clave_periodo(periodo: str) -> tuple:
+    """Orden cronológico a partir del texto del periodo."""
+    return _orden(extraer_anio(periodo), extraer_mes(periodo), periodo)
+
+
+# =========================== REGISTRO ===========================
+@dataclass(frozen=True, slots=True)
+class Recibo:
+    id: int
+    periodo: str
+    nombre_archivo: str
+    anio: str
+    mes: str
+    etiqueta: str            # lo que muestra el selectbox de periodos
+    orden: tuple             # (anio, índice del mes, día de inicio)
+    hash_contenido: str = ""  # sha256/hash/etag si el backend lo manda
+
+    @classmethod
+    def desde_dict(cls, r: dict) -> "Recibo":
+        periodo = r.get("periodo") or ""
+        nombre = r.get("nombre_archivo") or ""
+        anio = r.get("anio") or extraer_anio(periodo)
+        mes = r.get("mes") or extraer_mes(periodo)
+        hash_contenido = next((str(r[c]).strip('"') for c in ("sha256", "hash", "etag") if r.get(c)), "")
+        return cls(
+            id=r.get("id"),
+            periodo=periodo,
+            nombre_archivo=nombre,
+            anio=anio,
+            mes=mes,
+            etiqueta=f"{periodo} — {nombre}",
+            orden=_orden(anio, mes, periodo),
+            hash_contenido=hash_contenido,
+        )
+
+
+def etiqueta(recibo: Recibo) -> str:
+    """format_func del selectbox."""
+    return recibo.etiqueta
+
+
+# =========================== COLECCIÓN ===========================
+class ColeccionRecibos:
+    """Recibos agrupados por (año, mes), en orden cronológico dentro de cada mes."""
+    __slots__ = ("_por_mes", "_total")
+
+    def __init__(self, recibos):
+        por_mes: dict = {}
+        for r in sorted(recibos, key=attrgetter("orden")):
+            por_mes.setdefault((r.anio, r.mes), []).append(r)
+        self._por_mes = {k: tuple(v) for k, v in por_mes.items()}
+        self._total = sum(len(g) for g in self._por_mes.values())
+
+    @classmethod
+    def desde_json(cls, items: list) -> "ColeccionRecibos":
+        return cls(Recibo.desde_dict(r) for r in items)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def meses(self, anio: str) -> list:
+        """Meses con recibos en ese año, en orden de calendario (faceta del selectbox de mes)."""
+        meses = {m for a, m in self._por_mes if a == anio}
+        return [m for m in MESES_ORDEN if m in meses] + sorted(meses - set(MESES_ORDEN))
+
+    def del_mes(self, anio: str, mes: str) -> tuple:
+        return self._por_mes.get((anio, mes), ())
+
+
+# =========================== MICROBENCHMARK ===========================
+def _datos(total: int) -> list:
+    """Lista como la deja recibos._cargar_anio: dicts del backend con anio/mes."""
+    from stub_backend import generar_recibos
+
+    items = []
+    for r in generar_recibos(total):
+        periodo = r["periodo"]
+        items.append({"id": r["id"], "periodo": periodo, "nombre_archivo": r["nombre_archivo"],
+                      "anio": extraer_anio(periodo), "mes": extraer_mes(periodo)})
+    return items
+
+
+def _rerun_pandas(items: list, mes: str) -> list:
+    import pandas as pd
+
+    df = pd.DataFrame(items)
+    df_filtro = df[df["mes"] == mes] if not df.empty else df
+    opciones = df_filtro.to_dict("records")
+    return [f"{r['periodo']} — {r['nombre_archivo']}" for r in opciones]
+
+
+def _rerun_modelo(coleccion: ColeccionRecibos, anio: str, mes: str) -> list:
+    return [etiqueta(r) for r in coleccion.del_mes(anio, mes)]
+
+
+def _medir(fn, reruns: int) -> dict:
+    fn()  # calentamiento (imports, caches internos)
+    tracemalloc.start()
+    fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        fn()
+    return {"us": (time.perf_counter() - t0) / reruns * 1e6, "pico_kb": pico / 1024}
+
+
+def _comparar(total: int, reruns: int):
+    items = _datos(total)
+    anio, mes = items[-1]["anio"], items[-1]["mes"]
+    t0 = time.perf_counter()
+    coleccion = ColeccionRecibos.desde_json(items)
+    construir_ms = (time.perf_counter() - t0) * 1000
+
+    filas = []
+    try:
+        filas.append(("pandas (DataFrame + to_dict)", _medir(lambda: _rerun_pandas(items, mes), reruns)))
+    except ImportError:
+        print("pandas no está instalado: solo se mide ColeccionRecibos")
+    filas.append(("ColeccionRecibos", _medir(lambda: _rerun_modelo(coleccion, anio, mes), reruns)))
+
+    print(f"{total} recibos · {reruns} reruns · construir la colección (una vez): {construir_ms:.2f} ms")
+    print(f"{'camino':<30} {'µs/rerun':>10} {'pico KB':>9}")
+    for nombre, m in filas:
+        print(f"{nombre:<30} {m['us']:>10.1f} {m['pico_kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Selectbox de periodos: pandas contra ColeccionRecibos")
+    ap.add_argument("--recibos", type=int, default=48, help="recibos del empleado (2 por mes)")
+    ap.add_argument("--reruns", type=int, default=2000)
+    args = ap.parse_args()
+    _comparar(args.recibos, args.reruns)
@@ -0,0 +1,129 @@
+# optimizar_pdf.py
+"""
+Optimización opcional de los PDFs de un ZIP de recibos antes de subirlo.
+
+Por cada PDF:
+- deduplica los programas de fuente incrustados idénticos (el generador de
+  nómina repite la misma fuente en cada recibo/página),
+- comprime streams y agrupa objetos en object streams,
+- linealiza el archivo ("fast web view") para que la primera página se
+  muestre antes,
+y verifica que el resultado abre y conserva el número de páginas. Si algo
+falla, o el resultado no es más chico, se conserva el PDF original.
+
+Usa pikepdf (qpdf). Si no está instalado, `disponible()` devuelve False y la
+etapa no se ofrece.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pikepdf
+except ImportError:  # dependencia opcional
+    pikepdf = None
+
+LLAVES_FUENTE = ("/FontFile", "/FontFile2", "/FontFile3")
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def disponible() -> bool:
+    return pikepdf is not None
+
+
+def _deduplicar_fuentes(pdf) -> int:
+    """Apunta todas las copias idénticas de un programa de fuente a una sola."""
+    canonicas = {}
+    reemplazos = 0
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Dictionary) or obj.get("/Type") != "/FontDescriptor":
+            continue
+        for llave in LLAVES_FUENTE:
+            stream = obj.get(llave)
+            if not isinstance(stream, pikepdf.Stream):
+                continue
+            huella = hashlib.sha256(
+                repr(sorted((str(k), str(v)) for k, v in stream.stream_dict.items())).encode()
+                + stream.read_raw_bytes()
+            ).digest()
+            original = canonicas.setdefault(huella, stream)
+            if original.objgen != stream.objgen:
+                obj[llave] = original
+                reemplazos += 1
+    return reemplazos
+
+
+def optimizar_pdf(datos: bytes) -> bytes:
+    """Devuelve el PDF optimizado, o `datos` sin cambios si no es seguro/útil."""
+    try:
+        with pikepdf.open(io.BytesIO(datos)) as pdf:
+            paginas = len(pdf.pages)
+            _deduplicar_fuentes(pdf)
+            pdf.remove_unreferenced_resources()
+            salida = io.BytesIO()
+            pdf.save(
+                salida,
+                compress_streams=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                linearize=True,
+            )
+        nuevo = salida.getvalue()
+        with pikepdf.open(io.BytesIO(nuevo)) as verif:
+            if len(verif.pages) != paginas:
+                return datos
+        return nuevo if len(nuevo) < len(datos) else datos
+    except Exception:
+        return datos
+
+
+def _tarea(args):
+    nombre, datos = args
+    nuevo = optimizar_pdf(datos)
+    return nombre, nuevo, nuevo is not datos
+
+
+def optimizar_zip(contenido: bytes, max_workers: int = MAX_WORKERS):
+    """
+    Reescribe el ZIP optimizando cada PDF en un pool de procesos.
+    Devuelve (zip_bytes, reporte). Miembros que no son PDF se copian tal cual.
+    Si el pool falla (p. ej. un worker muere con un PDF malformado) se
+    devuelve el ZIP original y reporte["error"] dice por qué.
+    """
+    reporte = {"pdfs": 0, "optimizados": 0, "sin_cambio": 0,
+               "bytes_antes": 0, "bytes_despues": 0}
+    with zipfile.ZipFile(io.BytesIO(contenido)) as zin:
+        infos = zin.infolist()
+        pdfs = [(i.filename, zin.read(i)) for i in infos
+                if not i.is_dir() and i.filename.lower().endswith(".pdf")]
+
+        resultados = {}
+        reporte["pdfs"] = len(pdfs)
+        reporte["bytes_antes"] = sum(len(d) for _, d in pdfs)
+        if pdfs:
+            # spawn: hacer fork dentro del servidor multihilo de Streamlit puede dejar hijos bloqueados
+            contexto = multiprocessing.get_context("spawn")
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto) as pool:
+                    for nombre, datos, cambio in pool.map(_tarea, pdfs, chunksize=8):
+                        resultados[nombre] = datos
+                        reporte["optimizados" if cambio else "sin_cambio"] += 1
+            except Exception as e:  # incluye BrokenProcessPool
+                reporte.update(optimizados=0, sin_cambio=len(pdfs), bytes_despues=reporte["bytes_antes"],
+                               ahorro_bytes=0, error=f"{e.__class__.__name__}: {e}")
+                return contenido, reporte
+        reporte["bytes_despues"] = sum(len(d) for d in resultados.values())
+        del pdfs
+
+        salida = io.BytesIO()
+        with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+            for info in infos:
+                datos = resultados.get(info.filename)
+                if datos is None:
+                    datos = zin.read(info)
+                zout.writestr(info, datos)
+
+    reporte["ahorro_bytes"] = reporte["bytes_antes"] - reporte["bytes_despues"]
+    return salida.getvalue(), reporte
@@ -0,0 +1,155 @@
+# plazo.py
+"""
+Presupuesto de tiempo por rerun para las llamadas al backend.
+
+app.py abre un presupuesto al inicio de cada rerun (y cada fragmento que se
+re-ejecuta solo abre el suyo). Toda petición que pasa por resiliencia toma
+como timeout lo que quede del presupuesto, sin pasar del timeout propio de la
+llamada. Si ya no queda tiempo, o la llamada se corta porque el presupuesto
+fue el límite, se lanza PresupuestoAgotado (subclase de RequestException, así
+que los manejadores existentes la atrapan) y no se reintenta en otro host.
+
+Cada vista decide qué mostrar con lo que alcanzó a cargar; aviso_agotado()
+pinta el aviso con un botón de reintento. Los excesos se cuentan por vista o
+fragmento para el panel de administradores.
+
+Operaciones largas que el usuario pidió explícitamente (subir un ZIP,
+exportar) usan `with propio(segundos):` para tener su propio plazo.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import requests
+import streamlit as st
+
+PRESUPUESTO_S = float(os.environ.get("SYSTESO_PRESUPUESTO_S", "20"))
+MINIMO_S = 0.5   # con menos que esto no vale la pena empezar una petición
+
+_actual = contextvars.ContextVar("systeso_presupuesto", default=None)
+_excesos = Counter()
+_lock = threading.Lock()
+
+
+class PresupuestoAgotado(requests.RequestException):
+    def __init__(self, region: str):
+        self.region = region
+        self.mensaje = "La consulta tardó demasiado y se interrumpió; se muestra lo que alcanzó a cargar."
+        super().__init__(self.mensaje)
+
+
+class Presupuesto:
+    def __init__(self, segundos: float, region: str | None = None):
+        self.limite = time.monotonic() + segundos
+        self.region = region
+        self.agotado = False
+
+    def restante(self) -> float:
+        return self.limite - time.monotonic()
+
+    def nombre(self) -> str:
+        if self.region:
+            return self.region
+        return f"vista {st.session_state.get('view', '?')}"
+
+    def agotar(self) -> PresupuestoAgotado:
+        """Marca el exceso (una vez por presupuesto) y devuelve la excepción a lanzar."""
+        if not self.agotado:
+            self.agotado = True
+            with _lock:
+                _excesos[self.nombre()] += 1
+        return PresupuestoAgotado(self.nombre())
+
+
+# =========================== CICLO DE VIDA ===========================
+def iniciar_rerun(segundos: float = PRESUPUESTO_S):
+    """Al inicio de app.py: reemplaza cualquier presupuesto de un rerun anterior."""
+    _actual.set(Presupuesto(segundos))
+
+
+def _solo_fragmento() -> bool:
+    """True si este rerun ejecuta únicamente fragmentos (app.py no corrió desde arriba)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    ctx = get_script_run_ctx()
+    return bool(ctx and getattr(ctx, "fragment_ids_this_run", None))
+
+
+def por_fragmento(region: str, segundos: float = PRESUPUESTO_S):
+    """
+    Decorador para fragmentos: dentro de un rerun completo usan el presupuesto
+    de la app; cuando se re-ejecutan solos, abren uno nuevo.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            if not _solo_fragmento():
+                return fn(*args, **kwargs)
+            token = _actual.set(Presupuesto(segundos, region))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _actual.reset(token)
+        return envoltura
+    return deco
+
+
+@contextmanager
+def propio(segundos: float | None):
+    """Plazo independiente para una operación larga (None = sin presupuesto)."""
+    token = _actual.set(Presupuesto(segundos) if segundos is not None else None)
+    try:
+        yield
+    finally:
+        _actual.reset(token)
+
+
+# =========================== TIMEOUTS ===========================
+def timeout_para(timeout):
+    """
+    Recorta el timeout de una llamada (número, (conexión, lectura) o None) a
+    lo que queda del presupuesto. Devuelve (timeout, recortado).
+    """
+    p = _actual.get()
+    if p is None:
+        return timeout, False
+    restante = p.restante()
+    if restante < MINIMO_S:
+        raise p.agotar()
+    if timeout is None:
+        return restante, True
+    if isinstance(timeout, tuple):
+        conexion, lectura = timeout
+        recortado = (conexion is None or conexion > restante) or (lectura is None or lectura > restante)
+        return (min(conexion or restante, restante), min(lectura or restante, restante)), recortado
+    return min(timeout, restante), timeout > restante
+
+
+def restante() -> float | None:
+    """Segundos que quedan del presupuesto actual (None = sin presupuesto)."""
+    p = _actual.get()
+    return None if p is None else max(0.0, p.restante())
+
+
+def agotado_por_timeout():
+    """Una llamada recortada expiró: el límite fue el presupuesto, no el backend."""
+    p = _actual.get()
+    return p.agotar() if p is not None else None
+
+
+def excesos() -> list:
+    with _lock:
+        return [{"región": k, "excesos": n} for k, n in _excesos.most_common()]
+
+
+# =========================== UI ===========================
+def aviso_agotado(e: PresupuestoAgotado, clave: str):
+    st.warning(f"⏱️ {e.mensaje}")
+    if st.button("🔄 Reintentar", key=f"btn_reintentar_{clave}"):
+        st.rerun()
@@ -1,84 +1,74 @@
+import hashlib
 import streamlit as st
 import requests
-import pandas as pd
 import base64
-import re  # Inyección de expresiones regulares para la extracción definitiva
 from streamlit_pdf_viewer import pdf_viewer
 from utils import obtener_token
-
-# === Meses tal y como los muestras en la UI ===
-MESES_ORDEN = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
-               "Jul", "Ago", "Sept", "Oct", "Nov", "Dic"]
-
-# Normalización total desde los textos del periodo (soportando formatos cortos y nombres de mes completos de 2026/2027)
-MESES_MAP = {
-    "ene.": "Ene", "ene": "Ene", "enero": "Ene",
-    "feb.": "Feb", "feb": "Feb", "febrero": "Feb",
-    "mar.": "Mar", "mar": "Mar", "marzo": "Mar",
-    "abr.": "Abr", "abr": "Abr", "abril": "Abr",
-    "may.": "May", "mayo": "May",
-    "jun.": "Jun", "jun": "Jun", "junio": "Jun",
-    "jul.": "Jul", "jul": "Jul", "julio": "Jul",
-    "ago.": "Ago", "ago": "Ago", "agosto": "Ago",
-    "sept.": "Sept", "sep.": "Sept", "sept": "Sept", "sep": "Sept", "septiembre": "Sept",
-    "oct.": "Oct", "oct": "Oct", "octubre": "Oct",
-    "nov.": "Nov", "nov": "Nov", "noviembre": "Nov",
-    "dic.": "Dic", "dic": "Dic", "diciembre": "Dic",
-}
-
-def _extraer_mes(periodo: str) -> str:
-    """
-    Busca de forma flexible el mes en la primera fecha del periodo.
-    Soporta estructuras con guiones, diagonales o espacios extras.
-    """
-    try:
-        fecha_inicio = periodo.split(" al ")[0]
-        # Extrae el bloque alfabético central que representa al mes
-        match = re.search(r"\d{1,2}\s*[\/-]\s*([A-Za-zÁÉÍÓÚáéíóú\.]+)\s*[\/-]\s*\d{4}", fecha_inicio)
-        if match:
-            m = match.group(1).strip().lower()
-            return MESES_MAP.get(m, m.capitalize())
-        return "Otro"
-    except Exception:
-        return "Otro"
-
-def _extraer_anio(periodo: str) -> str:
+from resiliencia import CircuitoAbierto
+from plazo import PresupuestoAgotado, aviso_agotado, por_fragmento, propio
+from admision import turno_pdf, EsperaAgotada
+from cache_compartido import obtener_cache, clave_usuario, TTL_LISTA, TTL_PDF
+from diagnostico import medido
+from trabajos import enviar_zip, panel_trabajos, AsincronoNoDisponible
+import optimizar_pdf
+from validar_zip import validar_zip
+import backends
+import cache_navegador
+from codificacion import encabezados_lista, decodificar
+from modelo_recibos import ColeccionRecibos, extraer_anio, extraer_mes, etiqueta
+from cobertura import registrar_resultado_carga
+
+PAGINA_RECIBOS = 200  # tamaño de página al pedir recibos de un año
+TROZO_PDF = 256 * 1024  # lectura del PDF por trozos (la reserva de admisión crece con ellos)
+PLAZO_ZIP_S = 660     # subir y procesar un ZIP tiene su propio plazo (timeout de 600 s + conexión)
+
+def _descargar_pdf_bytes(ruta_pdf: str, headers: dict, turno=None):
     """
-    Extrae dinámicamente el año de 4 dígitos (2025, 2026, 2027, etc.) 
-    aislando el bloque numérico final de la primera fecha.
+    Descarga el PDF (siguiendo redirects) y valida tipo. Con turno, la reserva
+    de la fila de PDFs se corrige antes de traer el cuerpo: con Content-Length
+    si el backend lo manda y, si no, conforme llegan los trozos.
     """
     try:
-        fecha_inicio = periodo.split(" al ")[0]
-        match = re.search(r"\b(\d{4})\b", fecha_inicio)
-        if match:
-            return match.group(1)
-        return "0000"
-    except Exception:
-        return "0000"
-
-def _descargar_pdf_bytes(pdf_endpoint: str, headers: dict):
-    """Descarga el PDF (siguiendo redirects) y valida tipo."""
-    try:
-        r = requests.get(pdf_endpoint, headers=headers, allow_redirects=True, timeout=60)
+        r = backends.get(ruta_pdf, headers=headers, allow_redirects=True, timeout=60, stream=True)
+    except CircuitoAbierto as e:
+        return None, {"circuito_abierto": e.endpoint, "detail": e.mensaje}
+    except PresupuestoAgotado:
+        raise
     except Exception as e:
         return None, {"exception": type(e).__name__, "detail": str(e)}
 
-    if r.status_code != 200:
-        return None, {
-            "status": r.status_code,
-            "content_type": r.headers.get("content-type", ""),
-            "body_snippet": r.text[:300],
-        }
+    with r:
+        if r.status_code != 200:
+            return None, {
+                "status": r.status_code,
+                "content_type": r.headers.get("content-type", ""),
+                "body_snippet": r.text[:300],
+            }
+
+        largo = r.headers.get("content-length") or ""
+        if turno and largo.isdigit():
+            turno.ajustar(int(largo))
+        trozos, leidos = [], 0
+        try:
+            for trozo in r.iter_content(TROZO_PDF):
+                trozos.append(trozo)
+                leidos += len(trozo)
+                if turno:
+                    turno.cubrir(leidos)
+        except requests.RequestException as e:
+            return None, {"exception": type(e).__name__, "detail": str(e)}
+    contenido = b"".join(trozos)
+    del trozos
 
     content_type = (r.headers.get("content-type") or "").lower()
-    if not ("application/pdf" in content_type or r.content.startswith(b"%PDF-")):
+    if not ("application/pdf" in content_type or contenido.startswith(b"%PDF-")):
         return None, {
             "error": "not_pdf",
             "content_type": content_type,
-            "first_bytes": r.content[:16],
+            "first_bytes": contenido[:16],
         }
 
-    return r.content, None
+    return contenido, None
 
 def _mostrar_pdf_centrado(
     pdf_bytes: bytes,
@@ -111,6 +101,130 @@ def _mostrar_pdf_centrado(
     """
     st.markdown(html, unsafe_allow_html=True)
 
+# =========================== LISTADO PAGINADO ===========================
+def _error_respuesta(resp) -> dict:
+    return {
+        "status": resp.status_code,
+        "content_type": resp.headers.get("content-type", ""),
+        "body": resp.text[:300],
+    }
+
+def _avisar_conexion(e: Exception):
+    if isinstance(e, PresupuestoAgotado):
+        aviso_agotado(e, "recibos")
+    elif isinstance(e, CircuitoAbierto):
+        st.warning(f"⏳ {e.mensaje}")
+    else:
+        st.error("❌ No se pudo conectar con el backend.")
+        st.write({"exception": e.__class__.__name__, "detail": str(e)})
+
+def _anotar(recibos: list) -> list:
+    """Agrega anio/mes calculados a cada recibo (una sola vez por carga)."""
+    for r in recibos:
+        r["anio"] = extraer_anio(r.get("periodo", ""))
+        r["mes"] = extraer_mes(r.get("periodo", ""))
+    return recibos
+
+def _estado_recibos(token: str) -> dict:
+    """Cache por sesión: facetas + recibos por año. Se reinicia si cambia el token."""
+    cache = st.session_state.get("_recibos_cache")
+    if not cache or cache.get("token") != token:
+        cache = {"token": token, "facetas": None, "anios": {}}
+        st.session_state["_recibos_cache"] = cache
+    return cache
+
+def _cargar_facetas(cache: dict, headers: dict):
+    """
+    Resumen compacto {anio: [meses]} desde /recibos/facetas.
+    Si el backend aún no expone facetas, cae a la lista completa (comportamiento
+    anterior) y llena de una vez el cache de todos los años.
+    """
+    if cache["facetas"] is not None:
+        return None
+
+    compartido = obtener_cache()
+    clave = f"recibos:{clave_usuario(cache['token'])}:facetas"
+    facetas = compartido.get_json(clave)
+    if facetas is not None:
+        cache["facetas"] = facetas
+        return None
+
+    resp = backends.get("/recibos/facetas", headers=headers, timeout=15)
+    if resp.status_code == 200:
+        data = resp.json()
+        cache["facetas"] = {
+            str(f["anio"]): list(f.get("meses") or [])
+            for f in data.get("anios", [])
+        }
+        compartido.set_json(clave, cache["facetas"], TTL_LISTA)
+        return None
+    if resp.status_code not in (404, 405):
+        return _error_respuesta(resp)
+
+    # Backend sin facetas: lista completa
+    resp = backends.get("/recibos/", headers=encabezados_lista(headers), timeout=30)
+    if resp.status_code != 200:
+        return _error_respuesta(resp)
+    recibos = _anotar(decodificar(resp) or [])
+    por_anio: dict = {}
+    for r in recibos:
+        por_anio.setdefault(r["anio"], []).append(r)
+    facetas = {}
+    for anio, items in por_anio.items():
+        compartido.set_json(f"recibos:{clave_usuario(cache['token'])}:anio:{anio}", items, TTL_LISTA)
+        coleccion = cache["anios"][anio] = ColeccionRecibos.desde_json(items)
+        facetas[anio] = coleccion.meses(anio)
+    cache["facetas"] = facetas
+    compartido.set_json(clave, cache["facetas"], TTL_LISTA)
+    return None
+
+def _cargar_anio(cache: dict, headers: dict, anio: str):
+    """Trae (una vez por sesión) solo los recibos del año pedido, página por página."""
+    if anio in cache["anios"]:
+        return None
+
+    compartido = obtener_cache()
+    clave = f"recibos:{clave_usuario(cache['token'])}:anio:{anio}"
+    items = compartido.get_json(clave)
+    if items is not None:
+        cache["anios"][anio] = ColeccionRecibos.desde_json(items)
+        return None
+
+    # si un rerun anterior se quedó sin presupuesto, se continúa desde su cursor
+    items, cursor = cache.setdefault("parcial", {}).pop(anio, ([], None))
+    while True:
+        params = {"anio": anio, "limit": PAGINA_RECIBOS}
+        if cursor:
+            params["cursor"] = cursor
+        try:
+            resp = backends.get("/recibos/", headers=encabezados_lista(headers), params=params, timeout=30)
+        except PresupuestoAgotado:
+            cache["parcial"][anio] = (items, cursor)
+            raise
+        if resp.status_code != 200:
+            return _error_respuesta(resp)
+        data = decodificar(resp)
+        if isinstance(data, list):
+            # El backend ignoró los filtros: filtramos aquí
+            items = [r for r in _anotar(data) if r["anio"] == anio]
+            break
+        items.extend(data.get("items") or [])
+        cursor = data.get("next_cursor")
+        if not cursor:
+            items = _anotar(items)
+            break
+
+    compartido.set_json(clave, items, TTL_LISTA)
+    cache["anios"][anio] = ColeccionRecibos.desde_json(items)
+    return None
+
+def _recibos_del_anio(cache: dict, anio: str) -> ColeccionRecibos:
+    """Recibos completos del año o, si la carga se interrumpió, lo que alcanzó a llegar."""
+    if anio in cache["anios"]:
+        return cache["anios"][anio]
+    items, _ = cache.get("parcial", {}).get(anio, ([], None))
+    return ColeccionRecibos.desde_json(items)
+
 # =========================== PANTALLA RECIBOS ===========================
 def mostrar_recibos():
     token = obtener_token()
@@ -119,68 +233,129 @@ def mostrar_recibos():
         return
 
     headers = {"Authorization": f"Bearer {token}"}
+    cache = _estado_recibos(token)
 
-    # 1) Traer lista de recibos
-    resp = requests.get(
-        "https://systeso-backend-production.up.railway.app/recibos/",
-        headers=headers
-    )
-    if resp.status_code != 200:
+    # 1) Resumen de años/meses (compacto)
+    try:
+        err = _cargar_facetas(cache, headers)
+    except requests.RequestException as e:
+        _avisar_conexion(e); return
+    if err:
         st.error("Error al obtener recibos")
-        st.write({
-            "status": resp.status_code,
-            "content_type": resp.headers.get("content-type", ""),
-            "body": resp.text[:300],
-        })
+        st.write(err)
         return
 
-    recibos = resp.json()
-    if not recibos:
+    facetas = cache["facetas"]
+    if not facetas:
         st.info("No hay recibos disponibles.")
         return
 
-    # 2) Filtros Dinámicos (Año / Mes / Período)
-    df = pd.DataFrame(recibos)
-    df["anio"] = df["periodo"].apply(_extraer_anio)
-    df["mes"]  = df["periodo"].apply(_extraer_mes)
-
     st.subheader("📁 Consulta tus Recibos de Nómina")
     st.markdown("Filtra por año, mes y selecciona un recibo quincenal:")
+    _panel_recibos(token, headers, cache)
+
+# Los selectbox viven en un fragmento: cambiar año/mes/periodo re-ejecuta solo
+# este panel y no todo app.py (cookies, JWT, estilos, banner, sidebar...).
+@st.fragment
+@medido("fragmento recibos")
+@por_fragmento("fragmento recibos")
+def _panel_recibos(token: str, headers: dict, cache: dict):
+    facetas = cache["facetas"]
 
+    # 2) Filtros Dinámicos (Año / Mes / Período)
     col_anio, col_mes, col_periodo = st.columns([1, 1, 2])
 
     with col_anio:
         # sorted con reverse=True asegura que los años más nuevos (2026, 2027) salgan primero automáticamente
-        anios = sorted(df["anio"].unique(), reverse=True)
-        anio_filtro = st.selectbox("📅 Filtrar por año:", options=anios)
+        anios = sorted(facetas.keys(), reverse=True)
+        anio_filtro = st.selectbox("📅 Filtrar por año:", options=anios, key="sel_recibos_anio")
 
     with col_mes:
-        meses_presentes = set(df.loc[df["anio"] == anio_filtro, "mes"])
-        meses_disp = [m for m in MESES_ORDEN if m in meses_presentes] or sorted(list(meses_presentes))
-        mes_filtro = st.selectbox("📅 Filtrar por mes:", options=meses_disp)
+        meses_disp = facetas.get(anio_filtro) or []
+        mes_filtro = st.selectbox("📅 Filtrar por mes:", options=meses_disp, key="sel_recibos_mes")
 
-    df_filtro = df[(df["anio"] == anio_filtro) & (df["mes"] == mes_filtro)]
-    if df_filtro.empty:
+    # Los demás años se cargan solo cuando se seleccionan
+    try:
+        err = _cargar_anio(cache, headers, anio_filtro)
+    except PresupuestoAgotado as e:
+        aviso_agotado(e, "recibos_anio")  # se muestran los recibos que sí llegaron
+        err = None
+    except requests.RequestException as e:
+        _avisar_conexion(e); return
+    if err:
+        st.error("Error al obtener recibos")
+        st.write(err)
+        return
+
+    # la misma tupla de Recibo en cada rerun: sin DataFrame ni dicts nuevos
+    opciones = _recibos_del_anio(cache, anio_filtro).del_mes(anio_filtro, mes_filtro)
+    if not opciones:
         st.warning("No hay recibos para ese filtro.")
         return
 
     with col_periodo:
         seleccionado = st.selectbox(
             "📁 Elige un periodo:",
-            options=df_filtro.to_dict("records"),
-            format_func=lambda r: f"{r['periodo']} — {r['nombre_archivo']}",
+            options=opciones,
+            format_func=etiqueta,
+            key="sel_recibos_periodo",
         )
 
     if not seleccionado:
         return
 
-    # 3) Descargar bytes y mostrar grande/centrado
-    pdf_endpoint = f"https://systeso-backend-production.up.railway.app/recibos/{seleccionado['id']}/file"
-    pdf_bytes, err = _descargar_pdf_bytes(pdf_endpoint, headers)
+    # 3) Si el navegador ya tiene este recibo, lo pinta él y aquí no se descarga nada
+    estado_local = None
+    if cache_navegador.activo():
+        huella = cache_navegador.huella_recibo(seleccionado)
+        ambito = cache_navegador.ambito(st.session_state.get("rfc"), token)
+        estado_local = cache_navegador.estado_previo(seleccionado.id, huella)
+        if estado_local not in ("falta", "sin_idb"):
+            cache_navegador.mostrar(seleccionado.id, huella, ambito)
+            if estado_local is None:
+                st.caption("🔎 Buscando el recibo en este navegador...")
+            return
 
-    if err:
-        st.error("No se pudo cargar el archivo PDF.")
-        st.write({"endpoint": pdf_endpoint, **err})
+    # 4) Descargar bytes y mostrar grande/centrado (con turno en la fila de PDFs)
+    pdf_endpoint = f"/recibos/{seleccionado.id}/file"
+    compartido = obtener_cache()
+    clave_pdf = f"pdf:{clave_usuario(token)}:{seleccionado.id}"
+    pdf_bytes = compartido.get(clave_pdf)
+
+    if pdf_bytes is None:
+        aviso = st.empty()
+
+        def _mostrar_posicion(pos: int):
+            aviso.info(f"⏳ Hay mucha demanda en este momento. Tu lugar en la fila: **{pos}**")
+
+        usuario = st.session_state.get("rfc") or token[-16:]
+        try:
+            with turno_pdf(usuario, al_esperar=_mostrar_posicion) as turno:
+                aviso.empty()
+                pdf_bytes, err = _descargar_pdf_bytes(pdf_endpoint, headers, turno)
+                if pdf_bytes:
+                    turno.ajustar(len(pdf_bytes))
+        except EsperaAgotada:
+            aviso.warning("⏳ Hay demasiadas descargas en curso. Intenta de nuevo en un momento.")
+            return
+        except PresupuestoAgotado as e:
+            aviso.empty()
+            aviso_agotado(e, "pdf")
+            return
+
+        if err and "circuito_abierto" in err:
+            st.warning(f"⏳ {err['detail']}")
+            return
+        if err:
+            st.error("No se pudo cargar el archivo PDF.")
+            st.write({"endpoint": pdf_endpoint, **err})
+            return
+        compartido.set(clave_pdf, pdf_bytes, TTL_PDF)
+
+    if estado_local == "falta":
+        # viaja una sola vez: el componente lo guarda en IndexedDB y lo pinta
+        cache_navegador.mostrar(seleccionado.id, huella, ambito, pdf_bytes=pdf_bytes,
+                                nombre=seleccionado.nombre_archivo or "recibo.pdf")
         return
 
     col_izq, col_ctr, col_der = st.columns([0.05, 0.9, 0.05])
@@ -204,41 +379,122 @@ def subir_zip():
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             st.info(" Selecciona un archivo ZIP para comenzar.")
+        panel_trabajos(headers, token)
+        return
+
+    contenido = archivo.getvalue()
+    st.caption(f"Nombre: {archivo.name} · Tamaño: {len(contenido)/1024/1024:.2f} MB")
+    huella = hashlib.sha256(contenido).hexdigest()
+
+    # Validación local antes de que salga un solo byte
+    if not _reporte_validacion(huella, contenido):
+        panel_trabajos(headers, token)
         return
 
-    st.caption(f"Nombre: {archivo.name} · Tamaño: {len(archivo.getvalue())/1024/1024:.2f} MB")
+    if optimizar_pdf.disponible() and st.toggle(
+        "🗜️ Optimizar PDFs antes de subir", value=False, key="tgl_optimizar_pdf",
+        help="Deduplica fuentes, comprime y linealiza cada PDF. Los que no se puedan procesar se suben tal cual.",
+    ):
+        contenido = _zip_optimizado(huella, contenido)
+
+    en_segundo_plano = st.toggle(
+        "Procesar en segundo plano", value=True, key="tgl_zip_segundo_plano",
+        help="El ZIP se procesa en el backend sin bloquear esta pantalla; el resultado se conserva aunque recargues.",
+    )
 
-    if st.button("🚀 Subir ZIP", use_container_width=True):
-        with st.spinner("⏳ Subiendo y procesando..."):
-            files = {"archivo": (archivo.name, archivo.getvalue(), "application/zip")}
+    if st.button("🚀 Subir ZIP", use_container_width=True, key="btn_subir_zip"):
+        if en_segundo_plano:
             try:
-                resp = requests.post(
-                    "https://systeso-backend-production.up.railway.app/recibos/upload_zip",
-                    headers=headers,
-                    files=files,
-                    timeout=(15, 600),
-                    allow_redirects=True
-                )
+                with st.spinner("⏳ Subiendo..."), propio(PLAZO_ZIP_S):
+                    trabajo = enviar_zip(headers, archivo.name, contenido, token)
+                st.success(f"📨 ZIP recibido. Procesando en segundo plano (trabajo `{trabajo['job_id']}`).")
+            except AsincronoNoDisponible:
+                st.info("El backend no admite procesamiento en segundo plano; se procesará ahora.")
+                _subir_zip_sincrono(archivo.name, contenido, headers)
             except requests.RequestException as e:
                 st.error("❌ No se pudo conectar con el backend.")
                 st.write({"exception": e.__class__.__name__, "detail": str(e)})
-                return
-
-        if resp.status_code != 200:
-            try:
-                detail = resp.json()
-            except Exception:
-                detail = {
-                    "status": resp.status_code,
-                    "headers": dict(resp.headers),
-                    "body_snippet": resp.text[:500],
-                }
-            st.error("❌ Error al subir ZIP")
-            st.write(detail)
+        else:
+            _subir_zip_sincrono(archivo.name, contenido, headers)
+
+    panel_trabajos(headers, token)
+
+def _reporte_validacion(huella: str, contenido: bytes) -> bool:
+    """Valida una sola vez por archivo y muestra el reporte. False si hay errores."""
+    previo = st.session_state.get("_zip_validado")
+    if not previo or previo["huella"] != huella:
+        with st.spinner("🔍 Revisando el ZIP..."):
+            reporte = validar_zip(contenido)
+        previo = {"huella": huella, "reporte": reporte}
+        st.session_state["_zip_validado"] = previo
+
+    rep = previo["reporte"]
+    errores, avisos = rep["errores"], rep["avisos"]
+    resumen = f"{rep['pdfs']} PDFs revisados ({rep['bytes_pdf']/1024/1024:.1f} MB) en {rep['segundos']:.1f} s"
+    if errores:
+        st.error(f"❌ El ZIP tiene {len(errores)} problema(s) y no se subirá. {resumen}.")
+        st.dataframe(errores[:500], use_container_width=True, hide_index=True)
+    else:
+        st.caption(f"✅ {resumen}.")
+    if avisos:
+        with st.expander(f"⚠️ {len(avisos)} aviso(s)"):
+            st.dataframe(avisos[:500], use_container_width=True, hide_index=True)
+    return not errores
+
+def _zip_optimizado(huella: str, contenido: bytes) -> bytes:
+    """Optimiza una sola vez por archivo (el resultado se reutiliza en reruns)."""
+    previo = st.session_state.get("_zip_optimizado")
+    if not previo or previo["huella"] != huella:
+        with st.spinner("🗜️ Optimizando PDFs..."):
+            optimizado, reporte = optimizar_pdf.optimizar_zip(contenido)
+        previo = {"huella": huella, "zip": optimizado, "reporte": reporte}
+        st.session_state["_zip_optimizado"] = previo
+
+    rep = previo["reporte"]
+    if rep.get("error"):
+        st.warning(f"⚠️ No se pudieron optimizar los PDFs; se subirán sin cambios. ({rep['error']})")
+        return previo["zip"]
+    antes, despues = rep["bytes_antes"], rep["bytes_despues"]
+    pct = (1 - despues / antes) * 100 if antes else 0
+    st.caption(
+        f"PDFs: {rep['pdfs']} · Optimizados: {rep['optimizados']} · Sin cambio: {rep['sin_cambio']} · "
+        f"Ahorro: {rep['ahorro_bytes']/1024/1024:.2f} MB ({pct:.1f}%) · "
+        f"ZIP final: {len(previo['zip'])/1024/1024:.2f} MB"
+    )
+    return previo["zip"]
+
+def _subir_zip_sincrono(nombre: str, contenido: bytes, headers: dict):
+    with st.spinner("⏳ Subiendo y procesando..."), propio(PLAZO_ZIP_S):
+        files = {"archivo": (nombre, contenido, "application/zip")}
+        try:
+            resp = backends.post(
+                "/recibos/upload_zip",
+                headers=headers,
+                files=files,
+                timeout=(15, 600),
+                allow_redirects=True
+            )
+        except requests.RequestException as e:
+            st.error("❌ No se pudo conectar con el backend.")
+            st.write({"exception": e.__class__.__name__, "detail": str(e)})
             return
 
-        data = resp.json()
-        st.success("✅ ZIP procesado correctamente")
-        st.json(data)
-        if isinstance(data, dict) and "reparados" in data:
-            st.caption(f"Reparados: {data.get('reparados')} · Nuevos: {data.get('nuevo')} · Duplicados: {data.get('duplicados')}")
\ No newline at end of file
+    if resp.status_code != 200:
+        try:
+            detail = resp.json()
+        except Exception:
+            detail = {
+                "status": resp.status_code,
+                "headers": dict(resp.headers),
+                "body_snippet": resp.text[:500],
+            }
+        st.error("❌ Error al subir ZIP")
+        st.write(detail)
+        return
+
+    data = resp.json()
+    registrar_resultado_carga(data)
+    st.success("✅ ZIP procesado correctamente")
+    st.json(data)
+    if isinstance(data, dict) and "reparados" in data:
+        st.caption(f"Reparados: {data.get('reparados')} · Nuevos: {data.get('nuevo')} · Duplicados: {data.get('duplicados')}")
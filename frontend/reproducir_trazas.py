@@ -0,0 +1,230 @@
+# reproducir_trazas.py
+"""
+Reproduce trazas grabadas con trazas.py contra app.py y el stub local.
+
+Cada traza se ejecuta en su propio AppTest (streamlit.testing), con un
+backend stub en el mismo proceso y caches vacíos. Por traza se reporta la
+distribución de latencia de los reruns (p50/p95/máx) y cuántas llamadas
+recibió el backend por ruta:
+
+    python reproducir_trazas.py trazas/
+    python reproducir_trazas.py trazas/ --json reporte.json --max-p95-ms 800
+
+Con --max-p95-ms el proceso termina con código 1 si alguna traza lo excede,
+para usarlo como prueba de regresión.
+
+Notas:
+- AppTest siempre ejecuta el script completo, también cuando en producción
+  solo se re-ejecutaría un fragmento: las latencias son una cota superior.
+- La sesión se siembra con un JWT sintético en el cookie; el login real no
+  se reproduce (sus campos no se graban).
+- Los valores anonimizados se sustituyen por datos del stub: RFC y texto
+  libre por prefijos de RFC del stub, opciones por índice (h % opciones).
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import sys
+import time
+import urllib.request
+
+import stub_backend
+import trazas
+from modelo_recibos import Recibo
+from sesion_prueba import caches_frios, sembrar_sesion, sesion_activa
+
+TIPOS_WIDGET = ("button", "selectbox", "radio", "toggle", "checkbox", "text_input",
+                "number_input", "date_input", "multiselect")
+RUTAS_IGNORADAS = {"/", "/_stub/llamadas"}  # verificación de salud y el propio conteo
+
+
+# =========================== WIDGETS ===========================
+def _buscar_widget(at, clave: str):
+    for tipo in TIPOS_WIDGET:
+        for w in getattr(at, tipo):
+            if getattr(w, "key", None) == clave:
+                return tipo, w
+    return None, None
+
+
+def _texto_stub(valor: dict) -> str:
+    emp = valor["h"] % stub_backend.EMPLEADOS_STUB
+    if valor["anon"] == "numero":
+        return str(emp + 1)
+    return stub_backend.rfc_stub(emp)[:max(1, min(valor["n"], 13))]
+
+
+def _elegir_indice(w, idx: int):
+    """
+    select_index de AppTest le pasa a format_func el texto de la opción. Con
+    opciones Recibo (format_func=etiqueta) eso truena, así que se elige con un
+    Recibo cuya etiqueta es ese texto; la app recibe el Recibo real.
+    """
+    opcion = w.options[idx]
+    try:
+        if w.format_func(opcion) == opcion:
+            w.select_index(idx)
+            return
+    except AttributeError:
+        pass
+    w.set_value(Recibo(id=None, periodo="", nombre_archivo="", anio="", mes="",
+                       etiqueta=opcion, orden=()))
+
+
+def _aplicar(at, clave: str, valor) -> bool:
+    """Aplica un evento grabado. Devuelve False si el widget ya no existe."""
+    tipo, w = _buscar_widget(at, clave)
+    if w is None:
+        return False
+    if tipo == "button":
+        w.click()
+        return True
+    if tipo in ("selectbox", "radio"):
+        opciones = list(w.options)
+        if not opciones:
+            return False
+        if isinstance(valor, dict) and "periodo" in valor:
+            idx = next((i for i, o in enumerate(opciones) if str(o).startswith(valor["periodo"])), 0)
+        elif isinstance(valor, dict):
+            idx = valor.get("h", 0) % len(opciones)
+        elif str(valor) in opciones:
+            idx = opciones.index(str(valor))
+        else:
+            return False
+        if tipo == "radio":
+            w.set_value(opciones[idx])
+        else:
+            _elegir_indice(w, idx)
+        return True
+    if tipo == "date_input":
+        w.set_value(datetime.date.fromisoformat(valor))
+        return True
+    if isinstance(valor, dict):
+        valor = _texto_stub(valor)
+    w.set_value(valor)
+    return True
+
+
+# =========================== REPRODUCCIÓN ===========================
+def _llamadas(base: str) -> dict:
+    with urllib.request.urlopen(base + "/_stub/llamadas", timeout=5) as r:
+        return json.loads(r.read())
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p * (len(orden) - 1))))]
+
+
+def reproducir(ruta_traza: str, base: str, app: str, pausas: float = 0.0, timeout: float = 60) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    encabezado, eventos = trazas.leer(ruta_traza)
+    rol = encabezado.get("rol") or "usuario"
+    caches_frios()
+    antes = _llamadas(base)
+
+    at = AppTest.from_file(app, default_timeout=timeout)
+    sembrar_sesion(at, rol)
+    latencias, omitidos, errores = [], 0, []
+
+    def correr():
+        t0 = time.perf_counter()
+        at.run()
+        latencias.append(time.perf_counter() - t0)
+        errores.extend(str(e.value) for e in at.exception)
+
+    correr()
+    t_prev = 0
+    for ev in eventos:
+        if pausas and ev.get("t"):
+            time.sleep(max(0, ev["t"] - t_prev) / 1000 * pausas)
+            t_prev = ev["t"]
+        if ev.get("s") == 1 and not sesion_activa(at):
+            sembrar_sesion(at, ev.get("rol") or rol)  # hubo login en la sesión original
+        aplicados = 0
+        for clave, valor in (ev.get("w") or {}).items():
+            if _aplicar(at, clave, valor):
+                aplicados += 1
+            else:
+                omitidos += 1
+        vista = ev.get("vista")
+        if vista and "view" in at.session_state and at.session_state["view"] != vista and not aplicados:
+            at.session_state["view"] = vista
+            aplicados += 1
+        if aplicados:
+            correr()
+
+    despues = _llamadas(base)
+    llamadas = {
+        r: despues.get(r, 0) - antes.get(r, 0)
+        for r in despues if r not in RUTAS_IGNORADAS and despues.get(r, 0) != antes.get(r, 0)
+    }
+    return {
+        "traza": os.path.basename(ruta_traza),
+        "rol": rol,
+        "reruns": len(latencias),
+        "omitidos": omitidos,
+        "p50_ms": round(_percentil(latencias, 0.50) * 1000, 1),
+        "p95_ms": round(_percentil(latencias, 0.95) * 1000, 1),
+        "max_ms": round(max(latencias) * 1000, 1) if latencias else 0.0,
+        "llamadas_backend": sum(llamadas.values()),
+        "por_ruta": dict(sorted(llamadas.items())),
+        "errores": errores[:5],
+    }
+
+
+def _archivos(rutas: list) -> list:
+    salida = []
+    for r in rutas:
+        salida.extend(sorted(glob.glob(os.path.join(r, "*.jsonl"))) if os.path.isdir(r) else [r])
+    return salida
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reproduce trazas de sesión contra el stub local")
+    ap.add_argument("trazas", nargs="+", help="archivos .jsonl o carpetas con trazas")
+    ap.add_argument("--recibos", type=int, default=240, help="recibos sintéticos en el stub")
+    ap.add_argument("--pausas", type=float, default=0.0,
+                    help="factor de los tiempos de reflexión grabados (0 = sin pausas)")
+    ap.add_argument("--json", help="escribe el reporte completo en este archivo")
+    ap.add_argument("--max-p95-ms", type=float, help="falla si el p95 de alguna traza lo excede")
+    args = ap.parse_args()
+
+    aqui = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(aqui)  # app.py usa rutas relativas (banner)
+    srv, base = stub_backend.iniciar_en_hilo(total_recibos=args.recibos)
+    srv.segundos_por_zip = 0.5
+    os.environ["SYSTESO_BACKENDS"] = base
+    os.environ.pop("SYSTESO_TRAZAS_DIR", None)  # no grabar la propia reproducción
+    os.environ["SYSTESO_CACHE_NAVEGADOR"] = "0"  # AppTest no ejecuta componentes: sin respuesta del navegador
+    trazas.DIR_TRAZAS = ""
+
+    reporte = [reproducir(r, base, os.path.join(aqui, "app.py"), args.pausas) for r in _archivos(args.trazas)]
+
+    print(f"{'traza':<34} {'rol':<8} {'reruns':>6} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} {'llamadas':>8}")
+    for f in reporte:
+        print(f"{f['traza'][:34]:<34} {f['rol']:<8} {f['reruns']:>6} {f['p50_ms']:>8} "
+              f"{f['p95_ms']:>8} {f['max_ms']:>8} {f['llamadas_backend']:>8}")
+        for ruta, n in f["por_ruta"].items():
+            print(f"{'':<36}{ruta:<40} {n:>6}")
+        for e in f["errores"]:
+            print(f"{'':<36}⚠️ {e[:100]}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(reporte, fh, ensure_ascii=False, indent=2)
+
+    if args.max_p95_ms is not None:
+        lentas = [f["traza"] for f in reporte if f["p95_ms"] > args.max_p95_ms]
+        if lentas:
+            print(f"❌ p95 > {args.max_p95_ms} ms en: {', '.join(lentas)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 # reset_password.py
 import streamlit as st
-import requests
-
-BACKEND_BASE = "https://systeso-backend-production.up.railway.app"
+from enlaces import restablecer_password
 
 def mostrar_formulario_reset(token: str):
     st.title("🔑 Restablecer Contraseña")
@@ -22,16 +20,9 @@ def mostrar_formulario_reset(token: str):
         st.error("Las contraseñas no coinciden."); return
 
     with st.spinner("Procesando..."):
-        try:
-            resp = requests.post(
-                f"{BACKEND_BASE}/users/reset_password",
-                json={"token": token, "nueva_password": nueva},
-                timeout=20,
-            )
-        except requests.RequestException as e:
-            st.error(f"Error de red: {e}"); return
+        resultado = restablecer_password(token, nueva)
 
-    if resp.status_code == 200:
+    if resultado["estado"] == "ok":
         # Flash para login + redirección
         st.session_state["_flash_login"] = ("success", "Contraseña cambiada correctamente. Ya puedes iniciar sesión.")
         try:
@@ -42,9 +33,4 @@ def mostrar_formulario_reset(token: str):
         st.session_state["view"] = "login"
         st.rerun()
     else:
-        detail = "Error al cambiar la contraseña."
-        try:
-            detail = resp.json().get("detail", detail)
-        except Exception:
-            pass
-        st.error(detail)
+        st.error(resultado["detalle"])
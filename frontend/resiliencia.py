@@ -0,0 +1,263 @@
+# resiliencia.py
+"""
+Capa común para llamadas al backend:
+
+- Single-flight: peticiones GET idénticas y simultáneas (misma URL, parámetros
+  y token) dentro del proceso comparten una sola llamada en vuelo.
+- Circuit breaker por endpoint: tras varios fallos seguidos se abre y las
+  llamadas fallan de inmediato con un mensaje amable; pasado el tiempo de
+  enfriamiento deja pasar UNA prueba (semiabierto) para decidir si se cierra.
+- Presupuesto por rerun: el timeout de cada llamada se recorta a lo que
+  queda del plazo del rerun (ver plazo.py).
+"""
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+import plazo
+
+FALLOS_PARA_ABRIR = 5     # fallos consecutivos que abren el circuito
+ENFRIAMIENTO_S = 30       # segundos en abierto antes de probar de nuevo
+ESPERA_SEGUIDOR_S = 120   # tope de espera de un seguidor sin presupuesto (plazo.propio(None))
+
+CERRADO, ABIERTO, SEMIABIERTO = "cerrado", "abierto", "semiabierto"
+
+
+class CircuitoAbierto(requests.RequestException):
+    """El endpoint está marcado como caído; no se intentó la llamada."""
+
+    def __init__(self, endpoint: str, reintento_en: float):
+        self.endpoint = endpoint
+        self.reintento_en = max(0, int(reintento_en))
+        super().__init__(
+            f"El servicio no está respondiendo en este momento. "
+            f"Intenta de nuevo en {self.reintento_en or 1} s."
+        )
+
+    @property
+    def mensaje(self) -> str:
+        return str(self)
+
+
+# =========================== CIRCUIT BREAKER ===========================
+class CircuitBreaker:
+    def __init__(self, nombre: str, fallos_para_abrir: int = FALLOS_PARA_ABRIR,
+                 enfriamiento_s: float = ENFRIAMIENTO_S):
+        self.nombre = nombre
+        self.fallos_para_abrir = fallos_para_abrir
+        self.enfriamiento_s = enfriamiento_s
+        self._lock = threading.Lock()
+        self.estado = CERRADO
+        self.fallos_seguidos = 0
+        self.abierto_desde = 0.0
+        self._prueba_en_curso = False
+        # métricas
+        self.exitos = 0
+        self.fallos = 0
+        self.rechazos = 0
+        self.aperturas = 0
+
+    def antes(self):
+        """Lanza CircuitoAbierto si no debe intentarse la llamada."""
+        with self._lock:
+            if self.estado == CERRADO:
+                return
+            restante = self.abierto_desde + self.enfriamiento_s - time.monotonic()
+            if self.estado == ABIERTO and restante <= 0:
+                self.estado = SEMIABIERTO
+            if self.estado == SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return
+            self.rechazos += 1
+            raise CircuitoAbierto(self.nombre, restante)
+
+    def exito(self):
+        with self._lock:
+            self.exitos += 1
+            self.fallos_seguidos = 0
+            self._prueba_en_curso = False
+            self.estado = CERRADO
+
+    def sin_resultado(self):
+        """La llamada se cortó por motivos propios (no dice nada del endpoint)."""
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            self.fallos_seguidos += 1
+            probando = self._prueba_en_curso
+            self._prueba_en_curso = False
+            if probando or self.fallos_seguidos >= self.fallos_para_abrir:
+                if self.estado != ABIERTO:
+                    self.aperturas += 1
+                self.estado = ABIERTO
+                self.abierto_desde = time.monotonic()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "endpoint": self.nombre,
+                "estado": self.estado,
+                "fallos_seguidos": self.fallos_seguidos,
+                "exitos": self.exitos,
+                "fallos": self.fallos,
+                "rechazos": self.rechazos,
+                "aperturas": self.aperturas,
+            }
+
+
+# =========================== SINGLE-FLIGHT ===========================
+class _Vuelo:
+    __slots__ = ("listo", "resultado", "error", "seguidores")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+        self.seguidores = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos: dict = {}
+        self.compartidas = 0  # llamadas que se ahorraron
+
+    def hacer(self, clave, fn):
+        while True:
+            with self._lock:
+                vuelo = self._vuelos.get(clave)
+                lider = vuelo is None
+                if lider:
+                    vuelo = self._vuelos[clave] = _Vuelo()
+                else:
+                    vuelo.seguidores += 1
+                    self.compartidas += 1
+            if lider:
+                break
+
+            # cada seguidor espera con su propio plazo (sin presupuesto, con un tope)
+            restante = plazo.restante()
+            if not vuelo.listo.wait(ESPERA_SEGUIDOR_S if restante is None else restante):
+                if restante is None:
+                    raise requests.Timeout(f"La llamada compartida no terminó en {ESPERA_SEGUIDOR_S} s")
+                raise plazo.agotado_por_timeout()
+            if isinstance(vuelo.error, plazo.PresupuestoAgotado):
+                # se agotó el plazo del líder, no el de este seguidor: no se le
+                # cuenta exceso y, si aún tiene tiempo, lo intenta él como líder
+                with self._lock:
+                    self.compartidas -= 1
+                continue
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = fn()
+            return vuelo.resultado
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                self._vuelos.pop(clave, None)
+            vuelo.listo.set()
+
+
+# =========================== API ===========================
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+_vuelos = SingleFlight()
+
+_SEGMENTO_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def _endpoint(metodo: str, url: str) -> str:
+    """Agrupa por host + ruta, normalizando ids numéricos (/recibos/{id}/file)."""
+    partes = urlsplit(url)
+    ruta = _SEGMENTO_ID.sub("/{id}", partes.path.rstrip("/") or "/")
+    return f"{metodo.upper()} {partes.netloc}{ruta}"
+
+
+def breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        cb = _breakers.get(endpoint)
+        if cb is None:
+            cb = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return cb
+
+
+def _llamar(cb: CircuitBreaker, metodo: str, url: str, kwargs: dict, recortado: bool = False):
+    cb.antes()
+    try:
+        resp = requests.request(metodo, url, **kwargs)
+    except requests.Timeout as e:
+        if recortado:
+            # cortó el presupuesto del rerun, no el endpoint: no cuenta como fallo
+            cb.sin_resultado()
+            raise plazo.agotado_por_timeout() from e
+        cb.fallo()
+        raise
+    except requests.RequestException:
+        cb.fallo()
+        raise
+    if resp.status_code >= 500:
+        cb.fallo()
+    else:
+        cb.exito()
+    return resp
+
+
+def peticion(metodo: str, url: str, **kwargs) -> requests.Response:
+    """
+    Como requests.request, pero pasando por el circuit breaker del endpoint y,
+    para GET, compartiendo la llamada con peticiones idénticas en vuelo.
+    Lanza CircuitoAbierto (subclase de RequestException) si el endpoint está caído.
+    El timeout se recorta al presupuesto del rerun (plazo.py); si se agota,
+    lanza PresupuestoAgotado.
+    """
+    timeout = kwargs.get("timeout")
+    cb = breaker(_endpoint(metodo, url))
+    if metodo.upper() != "GET" or kwargs.get("stream"):
+        kwargs["timeout"], recortado = plazo.timeout_para(timeout)
+        return _llamar(cb, metodo, url, kwargs, recortado)
+
+    headers = kwargs.get("headers") or {}
+    params = kwargs.get("params") or {}
+    clave = (
+        url,
+        tuple(sorted((str(k), str(v)) for k, v in dict(params).items())),
+        headers.get("Authorization", ""),
+    )
+
+    def como_lider():
+        # se recorta al empezar la llamada: un seguidor que pasa a líder ya gastó plazo esperando
+        kwargs["timeout"], recortado = plazo.timeout_para(timeout)
+        return _llamar(cb, metodo, url, kwargs, recortado)
+
+    return _vuelos.hacer(clave, como_lider)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return peticion("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return peticion("POST", url, **kwargs)
+
+
+def metricas_breakers() -> list:
+    """Estado actual de cada circuito (una fila por endpoint)."""
+    with _breakers_lock:
+        cbs = list(_breakers.values())
+    return [cb.metricas() for cb in cbs]
+
+
+def llamadas_coalescidas() -> int:
+    """Llamadas que se resolvieron compartiendo otra ya en vuelo."""
+    return _vuelos.compartidas
@@ -0,0 +1,78 @@
+# sesion_prueba.py
+"""
+Utilidades compartidas por las herramientas que corren app.py en AppTest
+(reproducir_trazas.py, memoria_vistas.py): sesión sembrada con un JWT
+sintético y el estado de proceso reiniciado entre corridas (caches_frios).
+"""
+import base64
+import json
+import time
+
+import stub_backend
+
+
+class CookiesFijas:
+    """Sustituto de CookieManager: devuelve el cookie de sesión sembrado."""
+
+    def __init__(self, valores: dict):
+        self.valores = valores
+
+    def get_all(self, key=None):
+        return dict(self.valores)
+
+    def set(self, nombre, valor, **kwargs):
+        self.valores[nombre] = valor
+
+    def delete(self, nombre, **kwargs):
+        self.valores.pop(nombre, None)
+
+
+def jwt_sintetico(rol: str) -> str:
+    def b64(d):
+        return base64.urlsafe_b64encode(json.dumps(d).encode()).decode().rstrip("=")
+    return f"{b64({'alg': 'none'})}.{b64({'sub': 'replay', 'rol': rol, 'exp': int(time.time()) + 86400})}.x"
+
+
+def sembrar_sesion(at, rol: str):
+    from utils import COOKIE_NAME
+
+    token = jwt_sintetico(rol)
+    datos = {"token": token, "rol": rol, "nombre": "Replay", "rfc": stub_backend.rfc_stub(0)}
+    at.session_state["cookie_manager"] = CookiesFijas({COOKIE_NAME: json.dumps(datos)})
+    for k, v in datos.items():
+        at.session_state[k] = v
+
+
+def sesion_activa(at) -> bool:
+    return "token" in at.session_state and bool(at.session_state["token"])
+
+
+def caches_frios():
+    """
+    Deja el proceso como recién arrancado entre corridas: caches de Streamlit
+    y compartido, latencias/errores por host (backends), circuit breakers,
+    llamadas en vuelo (single-flight), fila de PDFs, tiempos de diagnostico y
+    excesos de presupuesto.
+    """
+    import streamlit as st
+
+    import admision
+    import backends
+    import cache_compartido
+    import diagnostico
+    import plazo
+    import resiliencia
+
+    cache_compartido._cache = None
+    st.cache_resource.clear()
+    with backends.registro._lock:
+        # mismo Registro (su hilo de salud sigue vivo), hosts sin historial
+        backends.registro.hosts = [backends.Host(h) for h in backends._hosts_configurados()]
+    with resiliencia._breakers_lock:
+        resiliencia._breakers.clear()
+    resiliencia._vuelos = resiliencia.SingleFlight()
+    admision.control_pdf = admision.ControlAdmision()
+    with diagnostico._lock:
+        diagnostico._muestras.clear()
+    with plazo._lock:
+        plazo._excesos.clear()
@@ -0,0 +1,312 @@
+# stub_backend.py
+"""
+Backend local de pruebas (sin dependencias externas).
+
+Imita los endpoints que usa el frontend con datos sintéticos para poder
+probar filtros, paginación y descargas sin tocar producción. Los listados
+respetan Accept (Arrow/msgpack si están instalados) y Accept-Encoding (gzip):
+
+    python stub_backend.py --port 8765 --recibos 2000
+    SYSTESO_BACKENDS=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import codificacion
+
+MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
+         "Jul", "Ago", "Sept", "Oct", "Nov", "Dic"]
+MESES_TEXTO = ["ene.", "feb.", "mar.", "abr.", "may.", "jun.",
+               "jul.", "ago.", "sept.", "oct.", "nov.", "dic."]
+
+# PDF mínimo válido (una página en blanco)
+PDF_MINIMO = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def pdf_de_tamano(nbytes: int) -> bytes:
+    """PDF_MINIMO relleno con líneas de comentario hasta ~nbytes (pruebas de memoria)."""
+    faltan = nbytes - len(PDF_MINIMO)
+    if faltan <= 0:
+        return PDF_MINIMO
+    linea = b"%" + b"0123456789abcdef" * 4 + b"\n"
+    relleno = linea * (faltan // len(linea) + 1)
+    corte = PDF_MINIMO.index(b"trailer")
+    return PDF_MINIMO[:corte] + relleno[:faltan - 1] + b"\n" + PDF_MINIMO[corte:]
+
+
+def generar_recibos(total: int, anio_inicial: int = 2025):
+    """Dos recibos por mes (quincenas), del más antiguo al más nuevo."""
+    recibos = []
+    for i in range(total):
+        mes_idx = (i // 2) % 12
+        anio = anio_inicial + (i // 24)
+        dia_ini, dia_fin = (1, 15) if i % 2 == 0 else (16, 28)
+        mes = MESES_TEXTO[mes_idx]
+        recibos.append({
+            "id": i + 1,
+            "periodo": f"{dia_ini:02d}/{mes}/{anio} al {dia_fin:02d}/{mes}/{anio}",
+            "nombre_archivo": f"recibo_{anio}_{mes_idx + 1:02d}_{i % 2 + 1}.pdf",
+            "_anio": str(anio),
+            "_mes": MESES[mes_idx],
+        })
+    return recibos
+
+
+EMPLEADOS_STUB = 500
+
+
+def rfc_stub(emp: int) -> str:
+    letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    a, b = divmod(emp, 26)
+    return f"{letras[a % 26]}{letras[b]}XX{80 + emp % 20:02d}{(emp % 12) + 1:02d}{(emp % 28) + 1:02d}A{emp % 10}{emp % 7}"
+
+
+def _resultado_zip(nbytes: int) -> dict:
+    return {"nuevo": max(1, nbytes // 50_000), "reparados": 0, "duplicados": 0}
+
+
+def _publico(r: dict) -> dict:
+    return {k: v for k, v in r.items() if not k.startswith("_")}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "SystesoStub/1.0"
+
+    def log_message(self, fmt, *args):  # silencioso por defecto
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    # ---------- helpers ----------
+    def _json(self, status: int, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _bytes(self, status: int, data: bytes, content_type: str, extra: dict | None = None):
+        comprimible = content_type != "application/pdf"
+        if comprimible and len(data) > 1024 and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data, compresslevel=5)
+            extra = {**(extra or {}), "Content-Encoding": "gzip"}
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _lista(self, items: list, paginado: bool = False, next_cursor=None):
+        """Listado en el formato que pida Accept; JSON si no se reconoce."""
+        accept = self.headers.get("Accept") or ""
+        cursor = {"X-Next-Cursor": next_cursor or ""} if paginado else None
+        if codificacion.CT_ARROW in accept and "arrow" in codificacion.formatos_disponibles() and items:
+            return self._bytes(200, codificacion.codificar(items, "arrow"), codificacion.CT_ARROW, cursor)
+        if codificacion.CT_MSGPACK in accept and "msgpack" in codificacion.formatos_disponibles():
+            data = {"items": items, "next_cursor": next_cursor} if paginado else items
+            return self._bytes(200, codificacion.codificar(data, "msgpack"), codificacion.CT_MSGPACK)
+        data = {"items": items, "next_cursor": next_cursor} if paginado else items
+        return self._bytes(200, json.dumps(data).encode("utf-8"), codificacion.CT_JSON)
+
+    def _contar(self, ruta: str):
+        with self.server.lock:
+            self.server.llamadas[ruta] = self.server.llamadas.get(ruta, 0) + 1
+
+    # ---------- rutas ----------
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        ruta = url.path.rstrip("/") or "/"
+        self._contar(ruta)
+
+        if ruta == "/recibos":
+            return self._listar_recibos(qs)
+        if ruta == "/recibos/facetas":
+            return self._facetas()
+        if ruta == "/recibos/admin/indice":
+            return self._indice_admin(qs)
+        if ruta.startswith("/recibos/") and ruta.endswith("/file"):
+            return self._bytes(200, self.server.pdf, "application/pdf")
+        if ruta == "/users/me":
+            return self._json(200, {"nombre": "Empleado Prueba", "rol": "usuario"})
+        if ruta == "/empleados":
+            return self._plantilla()
+        if ruta == "/empleados/historial_cargas":
+            return self._historial(qs)
+        if ruta.startswith("/recibos/jobs/"):
+            return self._estado_trabajo(ruta.rsplit("/", 1)[-1])
+        if ruta == "/users/verificar_email":
+            if qs.get("token", "").startswith("ok"):
+                return self._json(200, {"detail": "Correo verificado"})
+            return self._json(400, {"detail": "Token inválido o expirado"})
+        if ruta == "/_stub/llamadas":
+            with self.server.lock:
+                return self._json(200, dict(self.server.llamadas))
+        return self._json(404, {"detail": "Not Found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        ruta = url.path.rstrip("/") or "/"
+        self._contar(ruta)
+        nbytes = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(nbytes)
+
+        if ruta == "/users/reset_password":
+            return self._json(200, {"detail": "Contraseña actualizada"})
+        if ruta == "/recibos/upload_zip":
+            time.sleep(self.server.segundos_por_zip)
+            return self._json(200, _resultado_zip(nbytes))
+        if ruta == "/recibos/upload_zip_async":
+            job_id = uuid.uuid4().hex[:12]
+            with self.server.lock:
+                self.server.trabajos[job_id] = (time.time(), nbytes)
+            return self._json(202, {"job_id": job_id})
+        return self._json(404, {"detail": "Not Found"})
+
+    def _estado_trabajo(self, job_id: str):
+        with self.server.lock:
+            trabajo = self.server.trabajos.get(job_id)
+        if trabajo is None:
+            return self._json(404, {"detail": "Trabajo no encontrado"})
+        inicio, nbytes = trabajo
+        avance = (time.time() - inicio) / max(self.server.segundos_por_zip, 0.001)
+        if avance >= 1:
+            return self._json(200, {"estado": "terminado", "progreso": 1.0, "resultado": _resultado_zip(nbytes)})
+        return self._json(200, {"estado": "procesando", "progreso": round(avance, 2)})
+
+    def _listar_recibos(self, qs: dict):
+        recibos = self.server.recibos
+        paginado = any(k in qs for k in ("anio", "mes", "cursor", "limit"))
+        if not paginado:
+            # Compatibilidad: lista completa como el backend actual
+            return self._lista([_publico(r) for r in recibos])
+
+        if qs.get("anio"):
+            recibos = [r for r in recibos if r["_anio"] == qs["anio"]]
+        if qs.get("mes"):
+            recibos = [r for r in recibos if r["_mes"] == qs["mes"]]
+
+        limit = max(1, min(int(qs.get("limit", 100)), 1000))
+        # cursor = último id entregado (ids crecientes)
+        cursor = int(qs.get("cursor") or 0)
+        pagina = [r for r in recibos if r["id"] > cursor][:limit]
+        siguiente = pagina[-1]["id"] if len(pagina) == limit else None
+        return self._lista([_publico(r) for r in pagina], paginado=True,
+                           next_cursor=str(siguiente) if siguiente is not None else None)
+
+    def _indice_admin(self, qs: dict):
+        """Metadatos de todos los recibos (sintéticos: id -> empleado x quincena)."""
+        total = self.server.total_indice
+        limit = max(1, min(int(qs.get("limit", 1000)), 5000))
+        desde = int(qs.get("cursor") or 0) + 1
+        hasta = min(total, desde + limit - 1)
+        items = []
+        for rid in range(desde, hasta + 1):
+            emp, quincena = (rid - 1) % EMPLEADOS_STUB, (rid - 1) // EMPLEADOS_STUB
+            mes_idx, anio = (quincena // 2) % 12, 2025 + quincena // 24
+            dia_ini, dia_fin = (1, 15) if quincena % 2 == 0 else (16, 28)
+            mes = MESES_TEXTO[mes_idx]
+            if (emp + quincena) % 97 == 0:
+                continue  # algunos empleados sin recibo en algunas quincenas
+            items.append({
+                "id": rid,
+                "periodo": f"{dia_ini:02d}/{mes}/{anio} al {dia_fin:02d}/{mes}/{anio}",
+                "nombre_archivo": f"{emp + 1:05d}_{anio}_{mes_idx + 1:02d}_{quincena % 2 + 1}.pdf",
+                "rfc": rfc_stub(emp),
+                "clave": str(emp + 1),
+            })
+        return self._json(200, {
+            "items": items,
+            "next_cursor": str(hasta) if hasta < total else None,
+        })
+
+    def _plantilla(self):
+        return self._json(200, [
+            {"rfc": rfc_stub(emp), "clave": str(emp + 1), "nombre": f"Empleado {emp + 1}"}
+            for emp in range(EMPLEADOS_STUB)
+        ])
+
+    def _historial(self, qs: dict):
+        """Historial sintético de cargas de Excel (una por día)."""
+        total = self.server.total_historial
+        paginado = "limit" in qs or "cursor" in qs
+        desde = int(qs.get("cursor") or 0)
+        limit = max(1, min(int(qs.get("limit", 100)), 5000)) if paginado else total
+        filas = [
+            {
+                "nombre_archivo": f"empleados_{i:05d}.xlsx",
+                "fecha_carga": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(1735689600 + i * 86400)),
+                "usuario": f"admin{i % 3 + 1}@zapata.gob.mx",
+            }
+            for i in range(desde, min(total, desde + limit))
+        ]
+        if not paginado:
+            return self._lista(filas)
+        return self._lista(filas, paginado=True,
+                           next_cursor=str(desde + limit) if desde + limit < total else None)
+
+    def _facetas(self):
+        anios: dict[str, dict[str, int]] = {}
+        for r in self.server.recibos:
+            meses = anios.setdefault(r["_anio"], {})
+            meses[r["_mes"]] = meses.get(r["_mes"], 0) + 1
+        return self._json(200, {
+            "total": len(self.server.recibos),
+            "anios": [
+                {"anio": a, "meses": [m for m in MESES if m in meses], "total": sum(meses.values())}
+                for a, meses in sorted(anios.items(), reverse=True)
+            ],
+        })
+
+
+def crear_servidor(port: int = 8765, total_recibos: int = 240, verbose: bool = False,
+                   total_indice: int = 20000, bytes_pdf: int = 0, total_historial: int = 400):
+    srv = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    srv.recibos = generar_recibos(total_recibos)
+    srv.total_indice = total_indice
+    srv.trabajos = {}
+    srv.total_historial = total_historial
+    srv.segundos_por_zip = 10
+    srv.pdf = pdf_de_tamano(bytes_pdf)
+    srv.llamadas = {}
+    srv.lock = threading.Lock()
+    srv.verbose = verbose
+    return srv
+
+
+def iniciar_en_hilo(port: int = 0, total_recibos: int = 240):
+    """Arranca el stub en un hilo daemon; devuelve (servidor, base_url)."""
+    srv = crear_servidor(port, total_recibos)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backend local de pruebas para Systeso")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--recibos", type=int, default=240)
+    ap.add_argument("--indice", type=int, default=20000, help="recibos en el índice de administración")
+    ap.add_argument("--bytes-pdf", type=int, default=0, help="tamaño de cada PDF servido (0 = mínimo)")
+    ap.add_argument("--historial", type=int, default=400, help="cargas de Excel en el historial")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+    srv = crear_servidor(args.port, args.recibos, args.verbose, args.indice, args.bytes_pdf,
+                         args.historial)
+    print(f"Stub escuchando en http://127.0.0.1:{args.port}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,203 @@
+# trabajos.py
+"""
+Procesamiento de ZIPs en segundo plano.
+
+El ZIP se envía a /recibos/upload_zip_async, que responde de inmediato con un
+job_id; el backend lo procesa por su cuenta y el frontend consulta
+/recibos/jobs/{id} con backoff desde un fragmento que se re-ejecuta solo
+mientras haya trabajos pendientes; sin pendientes el panel no sondea.
+
+Los trabajos se guardan en session_state y en disco (un JSON por usuario en
+SYSTESO_TRABAJOS_DIR), así que tras recargar el navegador o volver a iniciar
+sesión se puede recuperar el resultado.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+import streamlit as st
+
+import backends
+from cobertura import registrar_resultado_carga
+from plazo import por_fragmento
+from utils import usuario_jwt
+
+DIR_TRABAJOS = os.environ.get("SYSTESO_TRABAJOS_DIR", "trabajos")
+POLL_INICIAL_S = 2
+POLL_MAXIMO_S = 30
+CONSERVAR_TERMINADOS_S = 7 * 24 * 3600
+TERMINALES = ("terminado", "error")
+
+
+class AsincronoNoDisponible(Exception):
+    """El backend no expone el modo asíncrono (usar la subida síncrona)."""
+
+
+# =========================== PERSISTENCIA ===========================
+def _dueno(token: str) -> str:
+    """
+    Identifica al usuario de forma estable entre sesiones: RFC si lo hay, si
+    no el sub del JWT (el token cambia en cada inicio de sesión).
+    """
+    base = st.session_state.get("rfc") or usuario_jwt(token) or token
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()[:24]
+
+
+def _ruta(dueno: str) -> str:
+    return os.path.join(DIR_TRABAJOS, f"{dueno}.json")
+
+
+def _leer_disco(dueno: str) -> list:
+    try:
+        with open(_ruta(dueno), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _escribir_disco(dueno: str, trabajos: list):
+    """Escritura atómica: archivo temporal + os.replace."""
+    os.makedirs(DIR_TRABAJOS, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=DIR_TRABAJOS, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(trabajos, f, ensure_ascii=False)
+        os.replace(tmp, _ruta(dueno))
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def trabajos_de_sesion(token: str) -> list:
+    """Trabajos del usuario; la primera vez en la sesión se recuperan de disco."""
+    if "_trabajos_zip" not in st.session_state:
+        limite = time.time() - CONSERVAR_TERMINADOS_S
+        st.session_state["_trabajos_zip"] = [
+            t for t in _leer_disco(_dueno(token))
+            if t.get("estado") not in TERMINALES or t.get("actualizado", 0) >= limite
+        ]
+    return st.session_state["_trabajos_zip"]
+
+
+def _guardar(token: str):
+    _escribir_disco(_dueno(token), st.session_state.get("_trabajos_zip", []))
+
+
+# =========================== BACKEND ===========================
+def enviar_zip(headers: dict, nombre: str, contenido: bytes, token: str) -> dict:
+    """Sube el ZIP al endpoint asíncrono y registra el trabajo. Devuelve el trabajo."""
+    files = {"archivo": (nombre, contenido, "application/zip")}
+    resp = backends.post("/recibos/upload_zip_async", headers=headers,
+                         files=files, timeout=(15, 120))
+    if resp.status_code in (404, 405):
+        raise AsincronoNoDisponible()
+    if resp.status_code not in (200, 202):
+        raise requests.HTTPError(f"HTTP {resp.status_code}: {resp.text[:300]}")
+
+    try:
+        job_id = str(resp.json()["job_id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise requests.HTTPError(f"Respuesta inesperada del backend: {resp.text[:300]}") from e
+
+    ahora = time.time()
+    trabajo = {
+        "job_id": job_id,
+        "archivo": nombre,
+        "estado": "en_cola",
+        "progreso": 0.0,
+        "resultado": None,
+        "detalle": None,
+        "creado": ahora,
+        "actualizado": ahora,
+        "proximo_poll": ahora + POLL_INICIAL_S,
+        "intervalo": POLL_INICIAL_S,
+    }
+    trabajos_de_sesion(token).insert(0, trabajo)
+    _guardar(token)
+    return trabajo
+
+
+def _consultar(headers: dict, trabajo: dict) -> bool:
+    """Consulta un trabajo si ya le toca. Devuelve True si cambió algo."""
+    ahora = time.time()
+    if trabajo["estado"] in TERMINALES or ahora < trabajo.get("proximo_poll", 0):
+        return False
+    cambio = False
+    try:
+        resp = backends.get(f"/recibos/jobs/{trabajo['job_id']}", headers=headers, timeout=10)
+        if resp.status_code == 404:
+            trabajo.update(estado="error", detalle="El backend ya no reconoce este trabajo.")
+            cambio = True
+        elif resp.status_code == 200:
+            data = resp.json()
+            nuevo = (data.get("estado", trabajo["estado"]), float(data.get("progreso") or 0))
+            cambio = nuevo != (trabajo["estado"], trabajo["progreso"])
+            trabajo.update(
+                estado=nuevo[0],
+                progreso=nuevo[1],
+                resultado=data.get("resultado"),
+                detalle=data.get("detalle"),
+            )
+            if cambio and nuevo[0] == "terminado":
+                registrar_resultado_carga(trabajo["resultado"])
+    except (requests.RequestException, ValueError):
+        pass
+
+    # Backoff: si no hubo avance, esperar el doble (hasta POLL_MAXIMO_S)
+    trabajo["intervalo"] = POLL_INICIAL_S if cambio else min(POLL_MAXIMO_S, trabajo.get("intervalo", POLL_INICIAL_S) * 2)
+    trabajo["proximo_poll"] = ahora + trabajo["intervalo"]
+    if cambio:
+        trabajo["actualizado"] = ahora
+    return cambio
+
+
+# =========================== UI ===========================
+def _pendientes(trabajos: list) -> bool:
+    return any(t["estado"] not in TERMINALES for t in trabajos)
+
+
+def panel_trabajos(headers: dict, token: str):
+    """Lista de trabajos con su progreso; solo sondea mientras haya pendientes."""
+    trabajos = trabajos_de_sesion(token)
+    if not trabajos:
+        return
+    if _pendientes(trabajos):
+        _panel_sondeando(headers, token)
+    else:
+        _pintar(trabajos)
+
+
+@st.fragment(run_every=POLL_INICIAL_S)
+@por_fragmento("fragmento trabajos")
+def _panel_sondeando(headers: dict, token: str):
+    """Solo este fragmento se re-ejecuta al sondear."""
+    trabajos = trabajos_de_sesion(token)
+    if any([_consultar(headers, t) for t in trabajos]):
+        _guardar(token)
+    if not _pendientes(trabajos):
+        st.rerun()  # todos terminaron: rerun completo para dejar de sondear
+    _pintar(trabajos)
+
+
+def _pintar(trabajos: list):
+    st.markdown("#### 🗂️ Procesamientos recientes")
+    for t in trabajos[:10]:
+        creado = time.strftime("%d/%m %H:%M", time.localtime(t["creado"]))
+        with st.container(border=True):
+            st.markdown(f"**{t['archivo']}** · {creado} · `{t['job_id']}`")
+            if t["estado"] == "terminado":
+                st.success("✅ ZIP procesado correctamente")
+                data = t.get("resultado")
+                if isinstance(data, dict) and "reparados" in data:
+                    st.caption(f"Reparados: {data.get('reparados')} · Nuevos: {data.get('nuevo')} · Duplicados: {data.get('duplicados')}")
+                with st.expander("Ver detalle"):
+                    st.json(data)
+            elif t["estado"] == "error":
+                st.error(f"❌ Error al procesar: {t.get('detalle') or 'sin detalle'}")
+            else:
+                st.progress(min(1.0, t["progreso"]), text=f"⏳ {t['estado'].replace('_', ' ')}…")
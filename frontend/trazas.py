@@ -0,0 +1,163 @@
+# trazas.py
+"""
+Grabación de trazas de interacción anónimas para reproducirlas después
+(ver reproducir_trazas.py).
+
+Se activa con SYSTESO_TRAZAS_DIR; sin la variable no hace nada. Cada sesión
+del navegador escribe un archivo JSONL compacto:
+
+    {"v": 1, "id": "...", "rol": "admin"}                    <- encabezado
+    {"t": 1520, "vista": "recibos", "s": 1, "w": {"sel_recibos_mes": "Feb"}}
+
+- t: milisegundos desde el inicio de la sesión (tiempos de reflexión);
+- vista / s: vista actual y si hay sesión iniciada (solo cuando cambian);
+- w: widgets con key que cambiaron desde la foto anterior.
+
+La foto se toma al inicio de cada rerun y de cada fragmento medido, cuando
+Streamlit ya aplicó los valores que mandó el navegador, así que también se
+capturan clics de botones que terminan en st.rerun().
+
+Anonimización: solo se graban widgets con prefijo conocido (nunca los campos
+de login/registro). El texto se graba tal cual únicamente en CLAVES_SEGURAS,
+cuyas opciones define la app (años, meses, periodos, formatos); cualquier otro
+texto se sustituye por su forma ({"anon": "rfc", "n": 10, "h": 123}). "h" usa
+una sal aleatoria por sesión, así que dos trazas no se pueden cruzar por el
+mismo valor. Los archivos subidos no se graban.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+
+import streamlit as st
+
+DIR_TRAZAS = os.environ.get("SYSTESO_TRAZAS_DIR", "")
+VERSION = 1
+
+PREFIJOS = ("sel_", "btn_", "txt_", "num_", "fmt_", "tgl_", "date_")
+# keys (o prefijos) cuyas opciones define la app: su texto se graba en claro
+CLAVES_SEGURAS = ("sel_recibos_anio", "sel_recibos_mes", "sel_cob_periodo", "fmt_")
+
+_EMAIL = re.compile(r"[^@\s]+@[^@\s]+")
+_RFC = re.compile(r"^[A-ZÑ&]{3,4}\d{2,6}[A-Z0-9]{0,3}$", re.IGNORECASE)
+_NUMERO = re.compile(r"^\d+$")
+
+
+def activo() -> bool:
+    return bool(DIR_TRAZAS)
+
+
+# =========================== ANONIMIZACIÓN ===========================
+def _forma(tipo: str, valor: str, sal: str) -> dict:
+    h = int(hashlib.sha256((sal + valor).encode("utf-8")).hexdigest()[:8], 16) % 1000
+    return {"anon": tipo, "n": len(valor), "h": h}
+
+
+def _anonimizar(valor, sal: str, segura: bool):
+    """segura=True solo para keys de CLAVES_SEGURAS; en las demás todo texto se oculta."""
+    if isinstance(valor, (bool, int, float)) or valor is None:
+        return valor
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, (list, tuple)):
+        return [_anonimizar(v, sal, segura) for v in valor]
+    if isinstance(valor, dict):
+        # opciones tipo registro (p. ej. el selectbox de periodos): basta el periodo
+        if "periodo" in valor:
+            return {"periodo": valor["periodo"]}
+        return _forma("registro", json.dumps(valor, sort_keys=True, default=str), sal)
+    if isinstance(getattr(valor, "periodo", None), str):
+        return {"periodo": valor.periodo}  # modelo_recibos.Recibo
+    texto = str(valor)
+    if segura:
+        return texto
+    if _EMAIL.search(texto):
+        return _forma("email", texto, sal)
+    if _NUMERO.match(texto):
+        return _forma("numero", texto, sal)
+    if _RFC.match(texto.strip()):
+        return _forma("rfc", texto.strip(), sal)
+    return _forma("texto", texto, sal)
+
+
+def _foto(sal: str) -> dict:
+    foto = {}
+    for clave in list(st.session_state.keys()):
+        if not isinstance(clave, str) or not clave.startswith(PREFIJOS):
+            continue
+        try:
+            valor = st.session_state[clave]
+        except KeyError:
+            continue
+        if clave.startswith("btn_") and valor is not True:
+            continue  # un botón solo interesa en el rerun del clic
+        foto[clave] = _anonimizar(valor, sal, segura=clave.startswith(CLAVES_SEGURAS))
+    return foto
+
+
+# =========================== GRABACIÓN ===========================
+def _escribir(ruta: str, fila: dict):
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(fila, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+
+def capturar(inicio: bool = False):
+    """
+    Toma la foto de widgets y agrega una línea si algo cambió.
+    inicio=True al arrancar un rerun completo: cada rerun es una interacción
+    nueva, así que un botón presionado cuenta aunque la foto previa también lo
+    tuviera (dos clics seguidos). Dentro del mismo rerun no se duplica.
+    """
+    if not DIR_TRAZAS:
+        return
+    traza = st.session_state.get("_traza")
+    if traza is None:
+        os.makedirs(DIR_TRAZAS, exist_ok=True)
+        ident = secrets.token_hex(6)
+        traza = st.session_state["_traza"] = {
+            "ruta": os.path.join(DIR_TRAZAS, f"{time.strftime('%Y%m%d-%H%M%S')}_{ident}.jsonl"),
+            "t0": time.time(),
+            "sal": secrets.token_hex(8),
+            "previo": {},
+            "vista": None,
+            "s": None,
+        }
+        _escribir(traza["ruta"], {"v": VERSION, "id": ident, "rol": st.session_state.get("rol") or None})
+
+    foto = _foto(traza["sal"])
+    previo = traza["previo"]
+    if inicio:
+        previo = {k: v for k, v in previo.items() if not k.startswith("btn_")}
+    cambios = {k: v for k, v in foto.items() if previo.get(k) != v}
+    traza["previo"] = foto
+
+    fila = {}
+    vista = st.session_state.get("view")
+    if vista != traza["vista"]:
+        fila["vista"] = traza["vista"] = vista
+    sesion = 1 if st.session_state.get("token") else 0
+    if sesion != traza["s"]:
+        fila["s"] = traza["s"] = sesion
+        if sesion and st.session_state.get("rol"):
+            fila["rol"] = st.session_state["rol"]
+    if cambios:
+        fila["w"] = cambios
+    if fila:
+        fila = {"t": int((time.time() - traza["t0"]) * 1000), **fila}
+        try:
+            _escribir(traza["ruta"], fila)
+        except OSError:
+            pass  # la traza nunca debe romper la app
+
+
+# =========================== LECTURA ===========================
+def leer(ruta: str) -> tuple:
+    """Devuelve (encabezado, eventos) de un archivo de traza."""
+    with open(ruta, encoding="utf-8") as f:
+        lineas = [json.loads(l) for l in f if l.strip()]
+    if not lineas or lineas[0].get("v") != VERSION:
+        raise ValueError(f"{ruta}: no es una traza v{VERSION}")
+    return lineas[0], lineas[1:]
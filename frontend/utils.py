@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 import streamlit as st
 import extra_streamlit_components as stx
 
+from exportar import limpiar_exportaciones
+
 EMAIL_REGEX = r"^[\w\.-]+@[\w\.-]+\.\w+$"
 PASSWORD_REGEX = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d).{8,}$"
 
@@ -120,6 +122,9 @@ def borrar_token():
     for k in ("token", "rol", "nombre", "rfc"):
         st.session_state.pop(k, None)
     st.session_state.pop("_cookies_cache", None)  # cache de cookies de este render
+    st.session_state.pop("_recibos_cache", None)  # facetas y recibos por año
+    st.session_state.pop("_trabajos_zip", None)  # se recuperan de disco al volver
+    limpiar_exportaciones()  # archivos temporales de exportación de esta sesión
     st.session_state["view"] = "login"
     try:
         st.query_params.clear()
@@ -176,6 +181,12 @@ def _jwt_payload(token: str):
     except Exception:
         return None
 
+def usuario_jwt(token: str):
+    """Identificador estable del usuario en el JWT (sub), o None."""
+    p = _jwt_payload(token)
+    sub = p.get("sub") if p else None
+    return str(sub) if sub else None
+
 def jwt_exp_unix(token: str):
     p = _jwt_payload(token)
     return p.get("exp") if p else None
@@ -0,0 +1,153 @@
+# validar_zip.py
+"""
+Validación local de un ZIP de recibos antes de subirlo.
+
+1) Directorio central (sin extraer nada): tipo de cada entrada, rutas
+   peligrosas, nombres duplicados, entradas cifradas o vacías, métodos de
+   compresión no soportados, razón de compresión sospechosa y convención de
+   nombres (RFC o clave de empleado + año del periodo).
+2) Contenido, en un pool de hilos: cada PDF se lee en streaming por bloques;
+   se comprueba la firma %PDF- al inicio y zipfile verifica el CRC-32 al
+   llegar al final del miembro. zlib y crc32 liberan el GIL, así que los
+   hilos sí avanzan en paralelo.
+
+Los problemas de tipo "error" bloquean la subida; los "aviso" solo se
+muestran. Con SYSTESO_ZIP_NOMBRES_ESTRICTO=1 los nombres fuera de convención
+también bloquean.
+"""
+import io
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+BLOQUE = 1024 * 1024
+MAX_WORKERS = max(2, min(8, os.cpu_count() or 2))
+RAZON_MAXIMA = 200          # descomprimido / comprimido, en miembros grandes: posible "zip bomb"
+TAM_SOSPECHOSO = 32 * 1024 * 1024
+NOMBRES_ESTRICTO = os.environ.get("SYSTESO_ZIP_NOMBRES_ESTRICTO") == "1"
+
+METODOS_SOPORTADOS = {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}
+IGNORABLES = re.compile(r"(^|/)(__MACOSX/|\.DS_Store$|Thumbs\.db$|desktop\.ini$)", re.IGNORECASE)
+
+_RFC = re.compile(r"[A-ZÑ&]{3,4}\d{6}[A-Z0-9]{3}", re.IGNORECASE)
+# clave de empleado al inicio del nombre ("01234_2026_01_1.pdf"); un año suelto no cuenta
+_CLAVE = re.compile(r"^(?!20\d{2}[_\-\s.])\d{1,6}(?=[_\-\s.])")
+_ANIO = re.compile(r"20\d{2}")
+
+
+def _problema(lista: list, archivo: str, detalle: str):
+    lista.append({"archivo": archivo, "problema": detalle})
+
+
+# =========================== DIRECTORIO CENTRAL ===========================
+def _revisar_entrada(info: zipfile.ZipInfo, errores: list, avisos: list) -> bool:
+    """Revisa metadatos; devuelve True si el contenido debe verificarse."""
+    nombre = info.filename
+    if IGNORABLES.search(nombre):
+        _problema(avisos, nombre, "Archivo del sistema operativo; el backend lo ignorará")
+        return False
+    if nombre.startswith(("/", "\\")) or ".." in nombre.replace("\\", "/").split("/"):
+        _problema(errores, nombre, "Ruta absoluta o con '..'")
+        return False
+    if not nombre.lower().endswith(".pdf"):
+        _problema(errores, nombre, "No es un PDF")
+        return False
+    if info.flag_bits & 0x1:
+        _problema(errores, nombre, "Entrada cifrada")
+        return False
+    if info.compress_type not in METODOS_SOPORTADOS:
+        _problema(errores, nombre, f"Método de compresión no soportado ({info.compress_type})")
+        return False
+    if info.file_size == 0:
+        _problema(errores, nombre, "Archivo vacío")
+        return False
+    if info.file_size > TAM_SOSPECHOSO and info.file_size / max(info.compress_size, 1) > RAZON_MAXIMA:
+        _problema(errores, nombre, "Razón de compresión sospechosa")
+        return False
+
+    base = nombre.rsplit("/", 1)[-1]
+    destino = errores if NOMBRES_ESTRICTO else avisos
+    if not (_RFC.search(base) or _CLAVE.match(base)):
+        _problema(destino, nombre, "El nombre no contiene RFC ni clave de empleado")
+    elif not _ANIO.search(base):
+        _problema(destino, nombre, "El nombre no indica el año del periodo")
+    return True
+
+
+# =========================== CONTENIDO ===========================
+def _verificar_miembro(zf: zipfile.ZipFile, info: zipfile.ZipInfo):
+    """Lee el miembro por bloques. Devuelve (error, aviso); None si está bien."""
+    try:
+        with zf.open(info) as f:
+            inicio = f.read(BLOQUE)
+            if inicio.lstrip()[:5] != b"%PDF-":
+                return "No empieza con la firma %PDF- (no es un PDF real)", None
+            cola = inicio[-1024:]
+            while True:
+                bloque = f.read(BLOQUE)  # al terminar, zipfile compara el CRC-32
+                if not bloque:
+                    break
+                cola = (cola + bloque)[-1024:]  # %%EOF puede quedar partido entre bloques
+    except zipfile.BadZipFile as e:
+        return f"Miembro dañado: {e}", None
+    except (OSError, EOFError, NotImplementedError) as e:
+        return f"No se pudo leer: {e}", None
+    if b"%%EOF" not in cola:
+        return None, "El PDF parece truncado (sin %%EOF)"
+    return None, None
+
+
+def validar_zip(contenido: bytes, max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Devuelve {"entradas", "pdfs", "bytes_pdf", "errores", "avisos", "segundos"},
+    donde errores/avisos son listas de {"archivo", "problema"}.
+    """
+    t0 = time.perf_counter()
+    errores, avisos = [], []
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(contenido))
+        infos = zf.infolist()
+    except zipfile.BadZipFile as e:
+        return {"entradas": 0, "pdfs": 0, "bytes_pdf": 0, "segundos": time.perf_counter() - t0,
+                "errores": [{"archivo": "(ZIP)", "problema": f"No es un ZIP válido: {e}"}], "avisos": []}
+
+    vistos, por_verificar = set(), []
+    for info in infos:
+        if info.is_dir():
+            continue
+        clave = info.filename.lower()
+        if clave in vistos:
+            _problema(errores, info.filename, "Nombre duplicado dentro del ZIP")
+            continue
+        vistos.add(clave)
+        if _revisar_entrada(info, errores, avisos):
+            por_verificar.append(info)
+    if not por_verificar and not errores:
+        _problema(errores, "(ZIP)", "El ZIP no contiene PDFs")
+
+    # un ZipFile por hilo: el objeto comparte posición de lectura y no es seguro entre hilos
+    local = threading.local()
+
+    def tarea(info):
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(io.BytesIO(contenido))
+        return info.filename, _verificar_miembro(local.zf, info)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="validar-zip") as pool:
+        for nombre, (error, aviso) in pool.map(tarea, por_verificar):
+            if error:
+                _problema(errores, nombre, error)
+            if aviso:
+                _problema(avisos, nombre, aviso)
+
+    return {
+        "entradas": len(infos),
+        "pdfs": len(por_verificar),
+        "bytes_pdf": sum(i.file_size for i in por_verificar),
+        "errores": errores,
+        "avisos": avisos,
+        "segundos": time.perf_counter() - t0,
+    }
@@ -1,7 +1,7 @@
 # frontend/verificacion.py
 
 import streamlit as st
-import requests
+from enlaces import verificar_token_email, restablecer_password
 
 def verificar_email():
     st.title("🔐 Verificación de Correo Electrónico")
@@ -13,33 +13,31 @@ def verificar_email():
         st.error("❌ No se proporcionó un token de verificación en la URL.")
         return
 
-    try:
-        url = f"https://systeso-backend-production.up.railway.app/users/verificar_email?token={token}"
-        response = requests.get(url)
+    resultado = verificar_token_email(token)
 
-        if response.status_code == 200:
-            st.success("✅ Tu correo fue verificado correctamente.")
-            st.toast("✅ Verificación exitosa. Ahora puedes iniciar sesión.")
-            st.session_state.view = "login"
-            st.rerun()
+    if resultado["estado"] == "ok":
+        st.success("✅ Tu correo fue verificado correctamente.")
+        st.toast("✅ Verificación exitosa. Ahora puedes iniciar sesión.")
+        st.query_params.clear()
+        st.session_state.view = "login"
+        st.rerun()
 
+    elif resultado["estado"] == "invalido":
+        detalle = resultado["detalle"].lower()
+        if "expirado" in detalle or "token" in detalle:
+            st.warning("⚠️ El enlace ha expirado o es inválido.")
+            st.toast("❌ Token expirado o inválido. Puedes solicitar un nuevo correo.")
+            st.query_params.clear()
+            st.session_state.view = "reenviar"
+            st.rerun()
         else:
-            try:
-                detalle = response.json().get("detail", "").lower()
-            except ValueError:
-                detalle = "Error inesperado del servidor."
-
+            st.error(f"❌ {detalle}")
 
-            if "expirado" in detalle or "token" in detalle:
-                st.warning("⚠️ El enlace ha expirado o es inválido.")
-                st.toast("❌ Token expirado o inválido. Puedes solicitar un nuevo correo.")
-                st.session_state.view = "reenviar"
-                st.rerun()
-            else:
-                st.error(f"❌ {detalle}")
-
-    except requests.exceptions.ConnectionError:
-        st.error("❌ No se pudo conectar con el servidor.")
+    else:
+        # error de red/servidor: el token se queda en la URL para reintentar
+        st.error(f"❌ {resultado['detalle']}")
+        if st.button("Reintentar"):
+            st.rerun()
 
 
 
@@ -58,12 +56,10 @@ def reset_password_frontend(token):
             st.error("La contraseña debe tener al menos 8 caracteres.")
         else:
             with st.spinner("Restableciendo..."):
-                resp = requests.post(
-                    "https://systeso-backend-production.up.railway.app/users/reset_password",
-                    json={"token": token, "nueva_password": nueva_password}
-                )
-                if resp.status_code == 200:
+                resultado = restablecer_password(token, nueva_password)
+                if resultado["estado"] == "ok":
                     st.success("Contraseña restablecida exitosamente. Inicia sesión con tu nueva contraseña.")
+                    st.query_params.clear()
                     if st.button("Ir al Login"):
                         st.session_state.view = "login"
                         st.rerun()
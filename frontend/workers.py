@@ -0,0 +1,77 @@
+# workers.py
+"""
+Modo multi-worker: varios procesos de Streamlit en la misma máquina que
+comparten el cache SQLite (ver cache_compartido.py).
+
+    python workers.py --workers 4 --base-port 8501
+
+Levanta `streamlit run app.py` en los puertos 8501..8504 con
+SYSTESO_CACHE=sqlite:<ruta> y espera a que terminen (Ctrl+C los detiene).
+
+Delante va un balanceador local con afinidad de sesión: Streamlit mantiene
+el estado de cada usuario en el proceso que abrió su websocket, así que el
+mismo navegador debe caer siempre en el mismo worker. Ejemplo con nginx:
+
+    upstream systeso {
+        ip_hash;
+        server 127.0.0.1:8501;
+        server 127.0.0.1:8502;
+        server 127.0.0.1:8503;
+        server 127.0.0.1:8504;
+    }
+    server {
+        listen 80;
+        location / {
+            proxy_pass http://systeso;
+            proxy_http_version 1.1;
+            proxy_set_header Upgrade $http_upgrade;
+            proxy_set_header Connection "upgrade";
+            proxy_set_header Host $host;
+            proxy_read_timeout 86400;
+        }
+    }
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lanza varios workers de Streamlit con cache compartido")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--base-port", type=int, default=8501)
+    ap.add_argument("--address", default="127.0.0.1")
+    ap.add_argument("--cache", default=os.path.join("cache", "systeso.db"),
+                    help="ruta del archivo SQLite compartido")
+    args = ap.parse_args()
+
+    env = dict(os.environ, SYSTESO_CACHE=f"sqlite:{os.path.abspath(args.cache)}")
+    procesos = []
+    for i in range(args.workers):
+        port = args.base_port + i
+        procesos.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py",
+             "--server.port", str(port),
+             "--server.address", args.address,
+             "--server.headless", "true"],
+            env=env,
+        ))
+        print(f"worker {i + 1}: http://{args.address}:{port}")
+
+    try:
+        for p in procesos:
+            p.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procesos:
+            if p.poll() is None:
+                p.send_signal(signal.SIGTERM)
+        for p in procesos:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()